@@ -11,9 +11,8 @@ from pathlib import Path
 from dotenv import load_dotenv
 from telethon import TelegramClient
 from datetime import datetime, timedelta, timezone
-import json
 
-from src.collectors import ChannelDataManager
+from src.collectors import AsyncTokenBucket, ChannelDataManager
 from src.youtube_collector import YoutubeCommentsCollector
 
 # Load environment variables
@@ -26,6 +25,7 @@ TELEGRAM_PHONE = os.getenv("TELEGRAM_PHONE")
 TELEGRAM_PASSWORD_2FA = os.getenv("TELEGRAM_PASSWORD_2FA")
 TELEGRAM_SESSION_NAME = "telegram_analyzer"
 TELEGRAM_REQUEST_DELAY = float(os.getenv("TELEGRAM_REQUEST_DELAY", "0.5"))
+TELEGRAM_CONCURRENCY = int(os.getenv("TG_CONCURRENCY", "4"))
 MAX_POST_AGE_DAYS = 7  # Telegram
 
 # YouTube API configuration
@@ -45,6 +45,9 @@ class TelegramCommentsCollector:
         self.phone = phone
         self.session_name = session_name
         self.client = None
+        self._bucket = AsyncTokenBucket(
+            1 / TELEGRAM_REQUEST_DELAY if TELEGRAM_REQUEST_DELAY > 0 else 0
+        )
 
     async def connect(self):
         """Connect to Telegram."""
@@ -70,96 +73,124 @@ class TelegramCommentsCollector:
             else:
                 raise
 
-    async def get_channel_posts(self, channel_username, limit=100):
-        """Fetch the latest posts from a channel."""
+    async def iter_channel_posts(self, channel, limit=100):
+        """Yield the latest posts from a channel (entity or username) as they arrive."""
         try:
-            channel = await self.client.get_entity(channel_username)
-            posts = []
-
             async for message in self.client.iter_messages(channel, limit=limit):
-                posts.append(
-                    {
-                        "id": message.id,
-                        "date": message.date.isoformat(),
-                        "text": message.text
-                        or message.message
-                        or "[Media without text]",
-                        "views": message.views,
-                        "forwards": message.forwards,
-                        "replies": getattr(message.replies, "replies", 0)
-                        if message.replies
-                        else 0,
-                    }
-                )
-
-            print(f"✓ Fetched {len(posts)} posts from {channel_username}")
-            return posts
+                date = message.date
+                text = message.text or message.message or "[Media without text]"
+                replies = message.replies
+                yield {
+                    "id": message.id,
+                    "date": date.isoformat(),
+                    "date_dt": date,  # in-memory only, popped before saving
+                    "text": text,
+                    "views": message.views,
+                    "forwards": message.forwards,
+                    "replies": replies.replies if replies is not None else 0,
+                }
 
         except Exception as e:
             print(f"✗ Error fetching posts: {e}")
-            return []
 
-    async def get_post_comments(
-        self, channel_username, post_id, existing_comment_ids=None
-    ):
-        """Fetch comments for a post."""
+    async def _resolve_senders(self, messages):
+        """
+        Map sender_id -> (username, first_name, last_name) for a batch of messages.
+
+        Uncached senders are fetched in a single request, and name fields are
+        read once per sender rather than once per comment.
+        """
+        senders = {}
+        missing = set()
+
+        for message in messages:
+            if message.sender is not None:
+                senders[message.sender_id] = message.sender
+            elif message.sender_id is not None:
+                missing.add(message.sender_id)
+
+        missing = list(missing - senders.keys())
+        if missing:
+            try:
+                entities = await self.client.get_entity(missing)
+                senders.update(zip(missing, entities))
+            except Exception:
+                # One unresolvable ID fails the whole batch; resolve one by one
+                # so only that sender loses its name. These are sequential and
+                # rate-limited like any other request, to avoid a FloodWait
+                for sender_id in missing:
+                    await self._bucket.acquire()
+                    try:
+                        senders[sender_id] = await self.client.get_entity(sender_id)
+                    except Exception:
+                        pass
+
+        return {
+            sender_id: (
+                getattr(sender, "username", None),
+                getattr(sender, "first_name", None),
+                getattr(sender, "last_name", None),
+            )
+            for sender_id, sender in senders.items()
+            if sender
+        }
+
+    async def get_post_comments(self, channel, post_id, existing_comment_ids=None):
+        """Fetch comments for a post (channel is an entity or username)."""
         if existing_comment_ids is None:
             existing_comment_ids = set()
 
+        # Comment IDs grow monotonically within a discussion thread, so every
+        # known comment is at or below the newest stored ID — let the server skip them
+        min_id = max(existing_comment_ids, default=0)
+
         try:
-            channel = await self.client.get_entity(channel_username)
+            messages = [
+                message
+                async for message in self.client.iter_messages(
+                    channel, reply_to=post_id, min_id=min_id
+                )
+                # Never hand back a known comment, whatever the server returns
+                if message.id not in existing_comment_ids
+                and (message.text or message.message)
+            ]
+            senders = await self._resolve_senders(messages)
             comments = []
-            new_count = 0
-
-            async for message in self.client.iter_messages(channel, reply_to=post_id):
-                if message.id in existing_comment_ids:
-                    continue
-
-                if message.text or message.message:
-                    user_info = {
-                        "id": message.sender_id,
-                        "username": None,
-                        "first_name": None,
-                        "last_name": None,
-                    }
 
-                    try:
-                        sender = await message.get_sender()
-                        if sender:
-                            user_info["username"] = getattr(sender, "username", None)
-                            user_info["first_name"] = getattr(
-                                sender, "first_name", None
-                            )
-                            user_info["last_name"] = getattr(sender, "last_name", None)
-                    except:
-                        pass
-
-                    comments.append(
-                        {
-                            "comment_id": message.id,
-                            "post_id": post_id,
-                            "comment_type": "top_level",  # Telegram has no nested replies
-                            "user": user_info,
-                            "text": message.text or message.message,
-                            "date": message.date.isoformat(),
-                        }
-                    )
-                    new_count += 1
+            for message in messages:
+                username, first_name, last_name = senders.get(
+                    message.sender_id, (None, None, None)
+                )
+                user_info = {
+                    "id": message.sender_id,
+                    "username": username,
+                    "first_name": first_name,
+                    "last_name": last_name,
+                }
+
+                comments.append(
+                    {
+                        "comment_id": message.id,
+                        "post_id": post_id,
+                        "comment_type": "top_level",  # Telegram has no nested replies
+                        "user": user_info,
+                        "text": message.text or message.message,
+                        "date": message.date.isoformat(),
+                    }
+                )
 
-            if new_count > 0:
-                print(f"  └─ Fetched {new_count} new comments")
+            if comments:
+                print(f"  └─ Post {post_id}: fetched {len(comments)} new comments")
 
             return comments
 
         except Exception as e:
             error_msg = str(e)
             if "key is not registered" in error_msg.lower():
-                print("  └─ ! Session error — reconnect required")
-                print(
-                    f"  └─ Tip: delete telegram_session_{channel_username.replace('@', '')}.session and restart"
-                )
+                print(f"  └─ Post {post_id}: ! Session error — reconnect required")
+                print(f"  └─ Tip: delete {self.session_name}.session and restart")
             else:
-                print(f"  └─ ✗ Error: {e}")
+                print(f"  └─ Post {post_id}: ✗ Error: {e}")
             return []
 
     async def sync_channel_data(
@@ -171,15 +202,16 @@ class TelegramCommentsCollector:
         print("\nPhase 1: Fetching data from Telegram")
         print("=" * 60)
 
-        print(f"Fetching latest {posts_limit} posts...")
-        posts = await self.get_channel_posts(channel_username, posts_limit)
-
-        if not posts:
-            print("✗ No posts found")
+        try:
+            channel = await self.client.get_entity(channel_username)
+        except Exception as e:
+            print(f"✗ Channel not found: {e}")
             return None
 
+        print(f"Fetching latest {posts_limit} posts...")
+
         stats = {
-            "total_posts": len(posts),
+            "total_posts": 0,
             "new_posts": 0,
             "updated_posts": 0,
             "skipped_posts": 0,
@@ -194,61 +226,87 @@ class TelegramCommentsCollector:
             f"\nProcessing posts (updating only posts newer than {MAX_POST_AGE_DAYS} days):\n"
         )
 
-        for i, post in enumerate(posts, 1):
+        semaphore = asyncio.Semaphore(TELEGRAM_CONCURRENCY)
+        # One directory scan instead of a stat() per post
+        existing_posts = set(data_manager.get_all_post_ids())
+
+        async def process_post(post, index):
             post_id = post["id"]
-            post_date = datetime.fromisoformat(post["date"])
+            post_date = post.pop("date_dt")
             post_age_days = (now - post_date).days
-
-            print(
-                f"[{i}/{len(posts)}] Post {post_id} ({post_age_days}d ago)...", end=" "
-            )
+            label = f"[{index}/{posts_limit}] Post {post_id} ({post_age_days}d ago)..."
 
             replies_count = post.get("replies", 0)
 
-            if data_manager.post_exists(str(post_id)):
+            if str(post_id) in existing_posts:
                 if post_date < cutoff_date:
-                    print("Skipped (older than 7 days)")
+                    print(f"{label} Skipped (older than 7 days)")
+                    stats["skipped_posts"] += 1
+                    return
+
+                existing_ids = data_manager.load_comment_ids(str(post_id))
+
+                if replies_count == 0 and not existing_ids:
+                    print(f"{label} Comments unavailable")
                     stats["skipped_posts"] += 1
+                    return
+
+                print(f"{label} Updating comments...")
+                async with semaphore:
+                    await self._bucket.acquire()
+                    new_comments = await self.get_post_comments(
+                        channel, post_id, existing_ids
+                    )
+
+                if new_comments:
+                    total = data_manager.append_comments(
+                        str(post_id), post, new_comments
+                    )
+                    stats["new_comments"] += len(new_comments)
+                    stats["total_comments"] += total
+                    stats["updated_posts"] += 1
                 else:
-                    if replies_count == 0 and not data_manager.load_comments(
-                        str(post_id)
-                    ):
-                        print("Comments unavailable")
-                        stats["skipped_posts"] += 1
-                    else:
-                        print("Updating comments...")
-                        existing_comments = data_manager.load_comments(str(post_id))
-                        existing_ids = {c["comment_id"] for c in existing_comments}
-
-                        new_comments = await self.get_post_comments(
-                            channel_username, post_id, existing_ids
-                        )
-
-                        if new_comments:
-                            all_comments = existing_comments + new_comments
-                            data_manager.save_post_data(
-                                str(post_id), post, all_comments
-                            )
-                            stats["new_comments"] += len(new_comments)
-                            stats["total_comments"] += len(all_comments)
-                            stats["updated_posts"] += 1
-                        else:
-                            stats["total_comments"] += len(existing_comments)
-                            stats["skipped_posts"] += 1
+                    stats["total_comments"] += len(existing_ids)
+                    stats["skipped_posts"] += 1
             else:
                 if replies_count == 0:
-                    print("Comments unavailable")
+                    print(f"{label} Comments unavailable")
                     data_manager.save_post_data(str(post_id), post, [])
+                    existing_posts.add(str(post_id))
                     stats["skipped_posts"] += 1
-                else:
-                    print("New post, downloading...")
-                    comments = await self.get_post_comments(channel_username, post_id)
-                    data_manager.save_post_data(str(post_id), post, comments)
-                    stats["new_posts"] += 1
-                    stats["new_comments"] += len(comments)
-                    stats["total_comments"] += len(comments)
+                    return
+
+                print(f"{label} New post, downloading...")
+                async with semaphore:
+                    await self._bucket.acquire()
+                    comments = await self.get_post_comments(channel, post_id)
+
+                data_manager.save_post_data(str(post_id), post, comments)
+                existing_posts.add(str(post_id))
+                stats["new_posts"] += 1
+                stats["new_comments"] += len(comments)
+                stats["total_comments"] += len(comments)
+
+        # Posts are fetched concurrently (bounded by TG_CONCURRENCY); the shared
+        # token bucket still caps the overall request rate
+        tasks = []
+        try:
+            async for post in self.iter_channel_posts(channel, posts_limit):
+                stats["total_posts"] += 1
+                tasks.append(
+                    asyncio.create_task(process_post(post, stats["total_posts"]))
+                )
+            await asyncio.gather(*tasks)
+        finally:
+            # If a post failed (or the post listing did), don't leave the
+            # other posts writing files after the client is disconnected
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
-            await asyncio.sleep(TELEGRAM_REQUEST_DELAY)
+        if not stats["total_posts"]:
+            print("✗ No posts found")
+            return None
 
         channel_info = {
             "channel": channel_username,
@@ -276,6 +334,43 @@ class TelegramCommentsCollector:
             print("✓ Disconnected from Telegram")
 
 
+def filter_comments(all_comments, args, is_youtube):
+    """Apply --only-replies / --only-top / --min-likes in a single pass."""
+    comment_type = None
+    if is_youtube:
+        if args.only_replies:
+            comment_type = "reply"
+        elif args.only_top:
+            comment_type = "top_level"
+    min_likes = args.min_likes
+
+    if comment_type is None and min_likes is None:
+        return all_comments
+
+    filtered = []
+    type_matched = 0
+    for c in all_comments:
+        if comment_type is not None and c.get("comment_type") != comment_type:
+            continue
+        type_matched += 1
+        if min_likes is not None and c.get("likes", 0) < min_likes:
+            continue
+        filtered.append(c)
+
+    # Filter by comment type (YouTube only)
+    original_count = len(all_comments)
+    if comment_type is not None:
+        label = "replies only" if comment_type == "reply" else "top-level only"
+        print(f"Filter: {label} — {type_matched} of {original_count}\n")
+        original_count = type_matched
+
+    # Filter by likes
+    if min_likes is not None:
+        print(f"Filter: {min_likes}+ likes — {len(filtered)} of {original_count}\n")
+
+    return filtered
+
+
 async def main():
     """Main entry point."""
     default_posts_tg = int(os.getenv("DEFAULT_POSTS_LIMIT", "100"))
@@ -428,7 +523,7 @@ NOTE: hate_comments.json is always created in data/.../analysis/
         print(f"✓ Found {len(all_post_ids)} {entity_name} with data")
 
         print("Loading all comments from local files...")
-        all_comments = data_manager.load_all_comments()
+        all_comments = data_manager.load_all_comments(all_post_ids)
 
         if not all_comments:
             print("✗ No comments in saved data")
@@ -436,33 +531,7 @@ NOTE: hate_comments.json is always created in data/.../analysis/
 
         print(f"✓ Loaded {len(all_comments)} comments\n")
 
-        # Filter by comment type (YouTube only)
-        if is_youtube and (args.only_replies or args.only_top):
-            original_count = len(all_comments)
-            if args.only_replies:
-                all_comments = [
-                    c for c in all_comments if c.get("comment_type") == "reply"
-                ]
-                print(
-                    f"Filter: replies only — {len(all_comments)} of {original_count}\n"
-                )
-            elif args.only_top:
-                all_comments = [
-                    c for c in all_comments if c.get("comment_type") == "top_level"
-                ]
-                print(
-                    f"Filter: top-level only — {len(all_comments)} of {original_count}\n"
-                )
-
-        # Filter by likes
-        if args.min_likes is not None:
-            original_count = len(all_comments)
-            all_comments = [
-                c for c in all_comments if c.get("likes", 0) >= args.min_likes
-            ]
-            print(
-                f"Filter: {args.min_likes}+ likes — {len(all_comments)} of {original_count}\n"
-            )
+        all_comments = filter_comments(all_comments, args, is_youtube)
 
     else:
         # Normal mode: connect to API
@@ -526,39 +595,14 @@ NOTE: hate_comments.json is always created in data/.../analysis/
             await collector.disconnect()
 
         print("\nLoading all comments from local files...")
-        all_comments = data_manager.load_all_comments()
+        all_post_ids = data_manager.get_all_post_ids()
+        all_comments = data_manager.load_all_comments(all_post_ids)
         entity_name = "posts" if is_telegram else "videos"
         print(
-            f"✓ Loaded {len(all_comments)} comments from {len(data_manager.get_all_post_ids())} {entity_name}\n"
+            f"✓ Loaded {len(all_comments)} comments from {len(all_post_ids)} {entity_name}\n"
         )
 
-        # Filter by comment type (YouTube only)
-        if is_youtube and (args.only_replies or args.only_top):
-            original_count = len(all_comments)
-            if args.only_replies:
-                all_comments = [
-                    c for c in all_comments if c.get("comment_type") == "reply"
-                ]
-                print(
-                    f"Filter: replies only — {len(all_comments)} of {original_count}\n"
-                )
-            elif args.only_top:
-                all_comments = [
-                    c for c in all_comments if c.get("comment_type") == "top_level"
-                ]
-                print(
-                    f"Filter: top-level only — {len(all_comments)} of {original_count}\n"
-                )
-
-        # Filter by likes
-        if args.min_likes is not None:
-            original_count = len(all_comments)
-            all_comments = [
-                c for c in all_comments if c.get("likes", 0) >= args.min_likes
-            ]
-            print(
-                f"Filter: {args.min_likes}+ likes — {len(all_comments)} of {original_count}\n"
-            )
+        all_comments = filter_comments(all_comments, args, is_youtube)
 
     # Common analysis section
     try:
@@ -573,17 +617,11 @@ NOTE: hate_comments.json is always created in data/.../analysis/
         # Build hate speech export path (if specified)
         export_hate_file = None
         if args.export_hate_speech:
-            if (
-                args.export_hate_speech.startswith("/")
-                or args.export_hate_speech[1:3] == ":\\"
-            ):
-                # Absolute path
-                export_hate_file = args.export_hate_speech
-            else:
+            export_path = Path(args.export_hate_speech).expanduser()
+            if not export_path.is_absolute():
                 # Relative path — save inside analysis directory
-                export_hate_file = str(
-                    data_manager.analysis_dir / args.export_hate_speech
-                )
+                export_path = data_manager.analysis_dir / export_path
+            export_hate_file = str(export_path)
 
         basic_stats = print_basic_statistics(
             all_comments, data_manager.analysis_dir, export_hate_file
@@ -614,7 +652,11 @@ NOTE: hate_comments.json is always created in data/.../analysis/
                 f"Estimated time: {int(estimated_minutes)} minutes ({estimated_requests} requests)\n"
             )
 
-            from src.stats_analyzer import analyze_comments_and_save
+            from src.stats_analyzer import (
+                CHECKPOINT_FILES,
+                analyze_comments_and_save,
+                save_analysis_results,
+            )
 
             results = analyze_comments_and_save(
                 all_comments,
@@ -624,12 +666,15 @@ NOTE: hate_comments.json is always created in data/.../analysis/
             )
 
             analysis_file = data_manager.analysis_dir / "latest_analysis.json"
-            with open(analysis_file, "w", encoding="utf-8") as f:
-                json.dump(results, f, ensure_ascii=False, indent=2)
+            save_analysis_results(results, analysis_file, all_comments)
 
             print(f"\n✓ Analysis results saved: {analysis_file}")
 
-            for temp_file in ["toxicity_temp.json", "political_temp.json"]:
+            for temp_file in [
+                "toxicity_temp.json",
+                "political_temp.json",
+                *CHECKPOINT_FILES,
+            ]:
                 temp_path = data_manager.analysis_dir / temp_file
                 if temp_path.exists():
                     temp_path.unlink()
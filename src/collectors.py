@@ -3,9 +3,22 @@ Base classes for comment collectors from different sources.
 """
 
 from abc import ABC, abstractmethod
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from typing import List, Dict, Optional
 from pathlib import Path
-import json
+import os
+import re
+
+from src.jsonio import read_json, write_json
+
+# Characters dropped from channel names (\w is Unicode-aware, same as str.isalnum)
+_NAME_STRIP_RE = re.compile(r"[^\w-]")
+
+# Load post files on a thread pool (set LOAD_PARALLEL=0 to load serially for debugging)
+_LOAD_PARALLEL = os.getenv("LOAD_PARALLEL", "1") != "0"
 
 
 class ChannelDataManager:
@@ -23,6 +36,7 @@ class ChannelDataManager:
         self.posts_dir = self.base_dir / "posts"
         self.analysis_dir = self.base_dir / "analysis"
         self.channel_info_file = self.base_dir / "channel_info.json"
+        self._post_ids_cache = None
 
         # Create directory structure
         self.posts_dir.mkdir(parents=True, exist_ok=True)
@@ -31,7 +45,7 @@ class ChannelDataManager:
     def _normalize_name(self, name: str) -> str:
         """Normalize channel name for use as a directory name."""
         clean = name.strip().lstrip("@").replace(" ", "_")
-        return "".join(c for c in clean if c.isalnum() or c in ("_", "-"))
+        return _NAME_STRIP_RE.sub("", clean)
 
     def get_post_dir(self, post_id: str) -> Path:
         """Return the directory path for a post."""
@@ -41,60 +55,195 @@ class ChannelDataManager:
         """Check whether a post directory exists."""
         return self.get_post_dir(post_id).exists()
 
+    def _load_combined(self, post_id: str) -> Optional[dict]:
+        """
+        Load a post's {"info": ..., "comments": [...]} document.
+
+        Posts saved before post.json existed are read from the legacy
+        post_info.json / comments.json pair; they are migrated on the next save.
+        """
+        post_dir = self.get_post_dir(post_id)
+        post_file = post_dir / "post.json"
+
+        try:
+            return read_json(post_file)
+        except FileNotFoundError:
+            info_file = post_dir / "post_info.json"
+            comments_file = post_dir / "comments.json"
+            if not info_file.exists() and not comments_file.exists():
+                return None
+            return {
+                "info": read_json(info_file) if info_file.exists() else None,
+                "comments": read_json(comments_file) if comments_file.exists() else [],
+            }
+
     def load_post_info(self, post_id: str) -> Optional[dict]:
         """Load post metadata."""
-        post_info_file = self.get_post_dir(post_id) / "post_info.json"
-        if post_info_file.exists():
-            with open(post_info_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return None
+        post = self._load_combined(post_id)
+        return post["info"] if post else None
 
     def load_comments(self, post_id: str) -> list:
         """Load comments for a post."""
-        comments_file = self.get_post_dir(post_id) / "comments.json"
-        if comments_file.exists():
-            with open(comments_file, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return []
+        post = self._load_combined(post_id)
+        return post["comments"] if post else []
+
+    def _load_comment_index(self, post_id: str) -> Optional[dict]:
+        """Load a post's comment_ids.json sidecar (None if there is none)."""
+        ids_file = self.get_post_dir(post_id) / "comment_ids.json"
+        try:
+            index = read_json(ids_file)
+        except FileNotFoundError:
+            return None
+        # Sidecars written before the newest thread date was kept are a bare list
+        return {"ids": index} if isinstance(index, list) else index
+
+    @staticmethod
+    def _newest_thread_date(comments: list) -> Optional[str]:
+        """Return the date of the newest top-level comment (None if there is none)."""
+        return max(
+            (c["date"] for c in comments if c.get("comment_type") == "top_level"),
+            default=None,
+        )
+
+    def load_comment_ids(self, post_id: str) -> set:
+        """
+        Load the set of known comment IDs for a post.
+
+        Reads the small comment_ids.json sidecar instead of parsing the full
+        post file; falls back to the stored comments for data saved before the
+        sidecar existed.
+        """
+        index = self._load_comment_index(post_id)
+        if index is not None:
+            return set(index["ids"])
+        return {c["comment_id"] for c in self.load_comments(post_id)}
+
+    def load_newest_thread_date(self, post_id: str) -> Optional[str]:
+        """
+        Load the date of a post's newest stored top-level comment.
+
+        Read from the comment_ids.json sidecar like load_comment_ids, with the
+        same fallback to the stored comments.
+        """
+        index = self._load_comment_index(post_id)
+        if index is not None and "newest_thread_date" in index:
+            return index["newest_thread_date"]
+        return self._newest_thread_date(self.load_comments(post_id))
 
     def save_post_data(self, post_id: str, post_info: dict, comments: list):
         """Save post data and comments."""
         post_dir = self.get_post_dir(post_id)
         post_dir.mkdir(exist_ok=True)
+        self._post_ids_cache = None
+
+        # post.json goes first: a crash in between leaves the sidecar behind
+        # (a re-fetch, deduplicated by append_comments), never ahead (lost comments)
+        write_json(post_dir / "post.json", {"info": post_info, "comments": comments})
+        write_json(
+            post_dir / "comment_ids.json",
+            {
+                "ids": [c["comment_id"] for c in comments],
+                "newest_thread_date": self._newest_thread_date(comments),
+            },
+            indent=False,
+        )
+
+        # Drop legacy split files once the combined file is written
+        for legacy_name in ("post_info.json", "comments.json"):
+            (post_dir / legacy_name).unlink(missing_ok=True)
 
-        with open(post_dir / "post_info.json", "w", encoding="utf-8") as f:
-            json.dump(post_info, f, ensure_ascii=False, indent=2)
+    def append_comments(self, post_id: str, post_info: dict, new_comments: list) -> int:
+        """
+        Append new comments to a post's saved comments.
+
+        Comments whose ID is already stored are skipped, so a comment_ids.json
+        sidecar left stale by an interrupted save cannot cause duplicates.
 
-        with open(post_dir / "comments.json", "w", encoding="utf-8") as f:
-            json.dump(comments, f, ensure_ascii=False, indent=2)
+        Returns:
+            Total number of comments stored for the post
+        """
+        comments = self.load_comments(post_id)
+        stored_ids = {c["comment_id"] for c in comments}
+        comments.extend(c for c in new_comments if c["comment_id"] not in stored_ids)
+        self.save_post_data(post_id, post_info, comments)
+        return len(comments)
 
     def get_all_post_ids(self) -> list:
-        """Return IDs of all saved posts."""
-        if not self.posts_dir.exists():
-            return []
-        return [d.name for d in self.posts_dir.iterdir() if d.is_dir()]
-
-    def load_all_comments(self) -> list:
-        """Load all comments from all posts."""
-        all_comments = []
-        for post_id in self.get_all_post_ids():
-            comments = self.load_comments(post_id)
-            all_comments.extend(comments)
-        return all_comments
+        """Return IDs of all saved posts (cached until the next save_post_data)."""
+        if self._post_ids_cache is None:
+            try:
+                with os.scandir(self.posts_dir) as it:
+                    self._post_ids_cache = [
+                        e.name for e in it if e.is_dir(follow_symlinks=False)
+                    ]
+            except FileNotFoundError:
+                return []
+        return list(self._post_ids_cache)
+
+    def load_all_comments(self, post_ids: Optional[list] = None) -> list:
+        """
+        Load all comments from all posts.
+
+        Args:
+            post_ids: post IDs to load (default: all saved posts)
+        """
+        if post_ids is None:
+            post_ids = self.get_all_post_ids()
+
+        if not _LOAD_PARALLEL or len(post_ids) < 2:
+            results = map(self.load_comments, post_ids)
+            return list(chain.from_iterable(results))
+
+        max_workers = min(32, (os.cpu_count() or 1) * 4)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(self.load_comments, post_ids)
+            return list(chain.from_iterable(results))
 
     def save_channel_info(self, info: dict):
         """Save channel metadata."""
-        with open(self.channel_info_file, "w", encoding="utf-8") as f:
-            json.dump(info, f, ensure_ascii=False, indent=2)
+        write_json(self.channel_info_file, info)
 
     def load_channel_info(self) -> dict:
         """Load channel metadata."""
         if self.channel_info_file.exists():
-            with open(self.channel_info_file, "r", encoding="utf-8") as f:
-                return json.load(f)
+            return read_json(self.channel_info_file)
         return {}
 
 
+class AsyncTokenBucket:
+    """Async token-bucket rate limiter for API requests."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate: tokens added per second (0 disables limiting)
+            capacity: maximum number of tokens (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a token is available, then consume it."""
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            now = time.monotonic()
+            refill = (now - self.last) * self.rate
+            self.tokens = min(self.capacity, self.tokens + refill)
+            self.last = now
+
+            if self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.tokens = 1
+                self.last = time.monotonic()
+
+            self.tokens -= 1
+
+
 class CommentsCollector(ABC):
     """Abstract base class for comment collectors."""
 
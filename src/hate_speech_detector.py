@@ -3,17 +3,60 @@ Keyword-based hate speech detector for Russian and Ukrainian language comments.
 No LLM required — uses compiled regex patterns for offline, instant detection.
 """
 
+import heapq
+from bisect import bisect_left
+import os
 import re
-from typing import List, Dict
-from collections import defaultdict
+from functools import lru_cache
+from itertools import accumulate
+from multiprocessing import Pool
+from typing import List, Dict, Tuple
+from collections import Counter, defaultdict
 from pathlib import Path
 
+from src.jsonio import atomic_open, dumps_indented
+
+# Separator for multi-word phrases; \s is Unicode-aware for str patterns, so it
+# also matches the non-breaking spaces Telegram clients often insert
+_PHRASE_SPACE = r"\s+"
+
+# Compiled scanner parts keyed by the pattern lists (read-only once built)
+_COMPILED_SCANNERS = {}
+
+# Worker processes for large scans; opt-in, as forking a process pool from a
+# program that may still have API threads alive is not safe everywhere
+# (HATE_WORKERS=0 uses all cores)
+_SCAN_WORKERS = int(os.getenv("HATE_WORKERS", "1")) or os.cpu_count() or 1
+
+# Below this many distinct texts, process start-up costs more than it saves
+_PARALLEL_MIN_TEXTS = 50_000
+
+# Per-process detector used by pool workers
+_worker_detector = None
+
+
+def _init_worker(hate_patterns: Dict):
+    """Build the detector once per worker process, with the caller's patterns."""
+    global _worker_detector
+    _worker_detector = HateSpeechDetector()
+    if hate_patterns != _worker_detector.hate_patterns:
+        _worker_detector.hate_patterns = hate_patterns
+        _worker_detector._compile_patterns()
+
+
+def _check_in_worker(text: str) -> Dict:
+    """Pool task: check one text with the worker's detector."""
+    return _worker_detector.check_comment(text)
+
 
 class HateSpeechDetector:
     """Keyword-based hate speech detector using prefix regex patterns."""
 
     def __init__(self):
         # Keyword patterns in Russian/Ukrainian (the only supported languages)
+        # Latin look-alike spellings (уzки, руz, роz) are listed literally rather
+        # than folded to Cyrillic: the Latin "z" is the signal, and a folded
+        # "роз" would also match ordinary words such as "роза"
         self.hate_patterns = {
             "death_wishes": [
                 "смерть москал",
@@ -94,23 +137,133 @@ class HateSpeechDetector:
         # Compile regex patterns for efficient matching
         self._compile_patterns()
 
+        # Repeated texts ("+", emojis, bot replies) are scanned only once
+        self._scan_lower_cached = lru_cache(maxsize=200_000)(self._scan_lower)
+
     def _compile_patterns(self):
-        """Compile regex patterns for all categories."""
-        self.compiled_patterns = {}
+        """
+        Compile all categories into a single prefix-trie regex.
+
+        The trie regex is the stdlib analogue of an Aho-Corasick automaton: one
+        pass over the text finds, at every word start, the longest phrase that
+        matches there. Every shorter phrase matching at the same position is a
+        prefix of that one, so the (category, phrase) hits for each longest
+        phrase are precomputed in self._hits_by_phrase.
+
+        Compiled scanners are shared by detectors with identical patterns.
+        """
+        cache_key = tuple(
+            (category, tuple(phrases))
+            for category, phrases in self.hate_patterns.items()
+        )
+        cached = _COMPILED_SCANNERS.get(cache_key)
+        if cached is not None:
+            (
+                self._scan_pattern,
+                self._hits_by_phrase,
+                self._category_order,
+                self._first_chars,
+            ) = cached
+            return
 
-        for category, phrases in self.hate_patterns.items():
-            patterns = []
+        trie = {}
+        for phrases in self.hate_patterns.values():
             for phrase in phrases:
-                escaped = re.escape(phrase)
-                # Allow multiple spaces between words
-                escaped = escaped.replace(r"\ ", r"\s+")
-                patterns.append(escaped)
-
-            # Left word boundary only — allows prefix matching (e.g. 'орк' matches 'орков')
-            combined_pattern = r"\b(?:" + "|".join(patterns) + r")"
-            self.compiled_patterns[category] = re.compile(
-                combined_pattern, re.IGNORECASE | re.UNICODE
-            )
+                node = trie
+                for char in " ".join(phrase.split()):
+                    node = node.setdefault(char, {})
+                node[""] = {}
+
+        # Left word boundary only — allows prefix matching (e.g. 'орк' matches 'орков')
+        # Case-sensitive on purpose: check_comment lowercases the text once up
+        # front, and re.IGNORECASE would re-fold every character during the scan.
+        self._scan_pattern = re.compile(
+            r"\b(?=(" + self._trie_to_regex(trie) + r"))", re.UNICODE
+        )
+
+        # For each phrase, the first-listed phrase of each category that it starts
+        # with — the same alternative a per-category regex would have picked
+        self._hits_by_phrase = {}
+        for phrases in self.hate_patterns.values():
+            for phrase in phrases:
+                key = " ".join(phrase.split())
+                if key in self._hits_by_phrase:
+                    continue
+                hits = []
+                for category, candidates in self.hate_patterns.items():
+                    for candidate in candidates:
+                        candidate = " ".join(candidate.split())
+                        if key.startswith(candidate):
+                            hits.append((category, candidate))
+                            break
+                self._hits_by_phrase[key] = hits
+
+        self._category_order = {
+            category: i for i, category in enumerate(self.hate_patterns)
+        }
+
+        # Every match starts with one of these, so text without any of them
+        # (English, emoji, links) can skip the regex scan entirely
+        self._first_chars = frozenset(trie)
+
+        _COMPILED_SCANNERS[cache_key] = (
+            self._scan_pattern,
+            self._hits_by_phrase,
+            self._category_order,
+            self._first_chars,
+        )
+
+    @classmethod
+    def _trie_to_regex(cls, node: Dict) -> str:
+        """Render a character trie as a regex that prefers the longest match."""
+        branches = []
+        for char, child in node.items():
+            if char == "":
+                continue
+            # Allow multiple spaces between words
+            edge = _PHRASE_SPACE if char == " " else re.escape(char)
+            branches.append(edge + cls._trie_to_regex(child))
+
+        if not branches:
+            return ""
+        if len(branches) == 1 and "" not in node:
+            return branches[0]
+
+        pattern = "(?:" + "|".join(branches) + ")"
+        return pattern + "?" if "" in node else pattern
+
+    def _scan_lower(self, text_lower: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """
+        Scan lowercased text for hate keywords.
+
+        Returns:
+            (categories, matches) as tuples so results can be cached
+        """
+        if self._first_chars.isdisjoint(text_lower):
+            return (), ()
+
+        found_categories = set()
+        all_matches = set()
+        category_end = {}
+
+        for m in self._scan_pattern.finditer(text_lower):
+            start = m.start()
+            matched = m.group(1)
+            if not matched.isalpha():
+                matched = " ".join(matched.split())
+
+            for category, phrase in self._hits_by_phrase[matched]:
+                # Matches within a category do not overlap (as with re.findall)
+                if start < category_end.get(category, 0):
+                    continue
+                category_end[category] = start + len(phrase)
+                found_categories.add(category)
+                all_matches.add(phrase)
+
+        return (
+            tuple(sorted(found_categories, key=self._category_order.get)),
+            tuple(all_matches),
+        )
 
     def check_comment(self, comment_text: str) -> Dict:
         """
@@ -125,28 +278,46 @@ class HateSpeechDetector:
         if not comment_text:
             return {"has_hate_speech": False, "categories": [], "matches": []}
 
-        text_lower = comment_text.lower()
-        found_categories = []
-        all_matches = []
-
-        for category, pattern in self.compiled_patterns.items():
-            matches = pattern.findall(text_lower)
-            if matches:
-                found_categories.append(category)
-                all_matches.extend(matches)
+        categories, matches = self._scan_lower_cached(comment_text.lower())
 
         return {
-            "has_hate_speech": len(found_categories) > 0,
-            "categories": found_categories,
-            "matches": list(set(all_matches)),
+            "has_hate_speech": len(categories) > 0,
+            "categories": list(categories),
+            "matches": list(matches),
         }
 
-    def analyze_comments(self, comments: List[Dict]) -> Dict:
+    def _scan_batch(self, texts: List[str], workers: int = 1) -> List[Dict]:
+        """
+        Check many comment texts at once.
+
+        Args:
+            texts: comment texts
+            workers: number of processes to spread large batches over
+
+        Returns:
+            List of detection results, in the same order as texts
+        """
+        if workers > 1 and len(texts) >= _PARALLEL_MIN_TEXTS:
+            chunksize = max(1, len(texts) // (workers * 4))
+            with Pool(
+                processes=workers,
+                initializer=_init_worker,
+                initargs=(self.hate_patterns,),
+            ) as pool:
+                return pool.map(_check_in_worker, texts, chunksize=chunksize)
+
+        check = self.check_comment
+        return [check(text) for text in texts]
+
+    def analyze_comments(
+        self, comments: List[Dict], workers: int = _SCAN_WORKERS
+    ) -> Dict:
         """
         Analyze a list of comments for hate speech.
 
         Args:
             comments: list of comment dicts
+            workers: number of processes for scanning large comment sets
 
         Returns:
             Dict with statistics
@@ -156,20 +327,24 @@ class HateSpeechDetector:
 
         total_comments = len(comments)
         comments_with_hate = 0
-        categories_count = defaultdict(int)
-        matches_count = defaultdict(int)
+        categories_count = Counter()
+        matches_count = Counter()
         users_with_hate = set()
         comments_by_category = defaultdict(list)
         hate_comments_list = []
 
         results_by_comment = {}
+        # Repeated texts (copy-pasted comments, "+", emoji) are scanned once
+        unique_texts = list(dict.fromkeys(comment["text"] for comment in comments))
+        results = self._scan_batch(unique_texts, workers)
+        results_by_text = dict(zip(unique_texts, results))
 
         for comment in comments:
             comment_id = comment["comment_id"]
             text = comment["text"]
             user_id = comment["user"]["id"]
 
-            result = self.check_comment(text)
+            result = results_by_text[text]
             results_by_comment[comment_id] = result
 
             if result["has_hate_speech"]:
@@ -177,21 +352,15 @@ class HateSpeechDetector:
                 users_with_hate.add(user_id)
                 hate_comments_list.append(comment)
 
+                categories_count.update(result["categories"])
+                matches_count.update(result["matches"])
+
+                # Indexes into hate_comments_list; resolved in get_category_examples
+                hate_index = len(hate_comments_list) - 1
                 for category in result["categories"]:
-                    categories_count[category] += 1
-                    comments_by_category[category].append(
-                        {
-                            "comment_id": comment_id,
-                            "user": comment["user"].get("username")
-                            or comment["user"].get("first_name")
-                            or "Unknown",
-                            "text": text,
-                            "matches": result["matches"],
-                        }
-                    )
+                    comments_by_category[category].append(hate_index)
 
-                for match in result["matches"]:
-                    matches_count[match] += 1
+        all_matches = matches_count.most_common()
 
         stats = {
             "total_comments": total_comments,
@@ -201,9 +370,8 @@ class HateSpeechDetector:
             else 0,
             "unique_users_with_hate": len(users_with_hate),
             "categories_stats": dict(categories_count),
-            "top_matches": sorted(
-                matches_count.items(), key=lambda x: x[1], reverse=True
-            )[:20],
+            "top_matches": all_matches[:20],
+            "all_matches": dict(all_matches),
             "comments_by_category": dict(comments_by_category),
             "results_by_comment": results_by_comment,
             "hate_comments_list": hate_comments_list,
@@ -233,20 +401,19 @@ class HateSpeechDetector:
 
         # Comment type breakdown (YouTube)
         if hate_comments:
-            top_level_hate = [
-                c for c in hate_comments if c.get("comment_type") == "top_level"
-            ]
-            reply_hate = [c for c in hate_comments if c.get("comment_type") == "reply"]
+            type_counts = Counter(c.get("comment_type") for c in hate_comments)
+            top_level_hate = type_counts["top_level"]
+            reply_hate = type_counts["reply"]
 
-            if len(top_level_hate) > 0 or len(reply_hate) > 0:
+            if top_level_hate > 0 or reply_hate > 0:
                 print("\nHate speech by comment type:")
-                if len(top_level_hate) > 0:
+                if top_level_hate > 0:
                     print(
-                        f"  • Top-level: {len(top_level_hate)} ({len(top_level_hate) / with_hate * 100:.1f}%)"
+                        f"  • Top-level: {top_level_hate} ({top_level_hate / with_hate * 100:.1f}%)"
                     )
-                if len(reply_hate) > 0:
+                if reply_hate > 0:
                     print(
-                        f"  • Replies:   {len(reply_hate)} ({len(reply_hate) / with_hate * 100:.1f}%)"
+                        f"  • Replies:   {reply_hate} ({reply_hate / with_hate * 100:.1f}%)"
                     )
 
         if stats["categories_stats"]:
@@ -329,8 +496,11 @@ class HateSpeechDetector:
             (101, float("inf"), "101+ comments"),
         ]
 
+        # Users per exact comment count; far fewer keys than users
+        users_by_count = Counter(comments_per_user)
+
         for min_val, max_val, label in groups:
-            count = sum(1 for c in comments_per_user if min_val <= c <= max_val)
+            count = sum(n for c, n in users_by_count.items() if min_val <= c <= max_val)
             if count > 0:
                 percentage = count / unique_users * 100
                 print(f"  • {label:20s}: {count:5d} users ({percentage:5.1f}%)")
@@ -340,9 +510,9 @@ class HateSpeechDetector:
             c for c in hate_comments if "likes" in c and c.get("likes", 0) > 0
         ]
         if comments_with_likes:
-            top_by_likes = sorted(
-                comments_with_likes, key=lambda x: x.get("likes", 0), reverse=True
-            )[:10]
+            top_by_likes = heapq.nlargest(
+                10, comments_with_likes, key=lambda x: x.get("likes", 0)
+            )
 
             print("\nTop-10 hate speech comments by likes:")
             for i, comment in enumerate(top_by_likes, 1):
@@ -363,18 +533,17 @@ class HateSpeechDetector:
         print("\nActivity concentration (percentiles, hate speech):")
         percentiles = [20, 40, 60, 80, 100]
 
+        # Comments written by the N most active users, for every N
+        cumulative_comments = list(accumulate(count for _, count, _ in users_list))
+
         for percentile in percentiles:
             target_comments = (percentile / 100) * total_hate_comments
 
-            cumulative_comments = 0
-            users_count = 0
-
-            while cumulative_comments < target_comments and users_count < len(
-                users_list
-            ):
-                _, count, _ = users_list[users_count]
-                cumulative_comments += count
-                users_count += 1
+            # Fewest top users whose comments reach the target
+            users_count = min(
+                bisect_left(cumulative_comments, target_comments) + 1,
+                len(cumulative_comments),
+            )
 
             percentage_of_users = (users_count / unique_users) * 100
             print(
@@ -395,8 +564,25 @@ class HateSpeechDetector:
         Returns:
             List of example comments
         """
-        comments = stats.get("comments_by_category", {}).get(category, [])
-        return comments[:limit]
+        indexes = stats.get("comments_by_category", {}).get(category, [])
+        hate_comments = stats.get("hate_comments_list", [])
+        results_by_comment = stats.get("results_by_comment", {})
+
+        examples = []
+        for index in indexes[:limit]:
+            comment = hate_comments[index]
+            comment_id = comment["comment_id"]
+            examples.append(
+                {
+                    "comment_id": comment_id,
+                    "user": comment["user"].get("username")
+                    or comment["user"].get("first_name")
+                    or "Unknown",
+                    "text": comment["text"],
+                    "matches": results_by_comment[comment_id]["matches"],
+                }
+            )
+        return examples
 
     def export_hate_comments(self, stats: Dict, output_file: str) -> bool:
         """
@@ -409,7 +595,6 @@ class HateSpeechDetector:
         Returns:
             True if successful, False otherwise
         """
-        import json
         from datetime import datetime, timezone
 
         hate_comments = stats.get("hate_comments_list", [])
@@ -419,19 +604,7 @@ class HateSpeechDetector:
             print("✗ No hate speech comments to export")
             return False
 
-        # Collect all matches (not just top-20)
-        all_matches_dict = {}
-        for comment in hate_comments:
-            comment_id = comment["comment_id"]
-            hate_result = results_by_comment.get(comment_id, {})
-            for match in hate_result.get("matches", []):
-                all_matches_dict[match] = all_matches_dict.get(match, 0) + 1
-
-        all_matches_sorted = sorted(
-            all_matches_dict.items(), key=lambda x: x[1], reverse=True
-        )
-
-        export_data = {
+        header = {
             "metadata": {
                 "export_date": datetime.now(timezone.utc).isoformat(),
                 "total_comments": stats["total_comments"],
@@ -441,43 +614,54 @@ class HateSpeechDetector:
             },
             "categories_stats": stats.get("categories_stats", {}),
             "top_matches": dict(stats.get("top_matches", [])),
-            "all_matches": dict(all_matches_sorted),
-            "comments": [],
+            "all_matches": stats.get("all_matches", {}),
         }
 
-        for comment in hate_comments:
-            comment_id = comment["comment_id"]
-            hate_result = results_by_comment.get(comment_id, {})
-
-            export_comment = {
-                "comment_id": comment_id,
-                "post_id": comment.get("post_id"),
-                "user": {
-                    "id": comment["user"]["id"],
-                    "username": comment["user"].get("username"),
-                    "first_name": comment["user"].get("first_name"),
-                },
-                "text": comment["text"],
-                "date": comment.get("date"),
-                "likes": comment.get("likes", 0),
-                "comment_type": comment.get("comment_type"),
-                "hate_speech": {
-                    "categories": hate_result.get("categories", []),
-                    "matches": hate_result.get("matches", []),
-                },
-            }
-
-            export_data["comments"].append(export_comment)
-
         # Sort by likes descending
-        export_data["comments"].sort(key=lambda x: x["likes"], reverse=True)
+        sorted_comments = sorted(
+            hate_comments, key=lambda x: x.get("likes", 0), reverse=True
+        )
 
         try:
             output_path = Path(output_file)
             output_path.parent.mkdir(parents=True, exist_ok=True)
 
-            with open(output_path, "w", encoding="utf-8") as f:
-                json.dump(export_data, f, ensure_ascii=False, indent=2)
+            # Written record by record, so export copies of all comments are
+            # never held in memory at once (same layout as json.dump(indent=2));
+            # an error midway leaves any previous export in place
+            with atomic_open(output_path) as f:
+                f.write(b"{")
+                for key, value in header.items():
+                    f.write(b"\n  " + dumps_indented(key, 1) + b": ")
+                    f.write(dumps_indented(value, 1) + b",")
+                f.write(b'\n  "comments": [')
+
+                for i, comment in enumerate(sorted_comments):
+                    comment_id = comment["comment_id"]
+                    hate_result = results_by_comment.get(comment_id, {})
+
+                    export_comment = {
+                        "comment_id": comment_id,
+                        "post_id": comment.get("post_id"),
+                        "user": {
+                            "id": comment["user"]["id"],
+                            "username": comment["user"].get("username"),
+                            "first_name": comment["user"].get("first_name"),
+                        },
+                        "text": comment["text"],
+                        "date": comment.get("date"),
+                        "likes": comment.get("likes", 0),
+                        "comment_type": comment.get("comment_type"),
+                        "hate_speech": {
+                            "categories": hate_result.get("categories", []),
+                            "matches": hate_result.get("matches", []),
+                        },
+                    }
+
+                    f.write(b"\n    " if i == 0 else b",\n    ")
+                    f.write(dumps_indented(export_comment, 2))
+
+                f.write(b"\n  ]\n}")
 
             print(
                 f"\n✓ Exported {len(hate_comments)} hate speech comments: {output_path}"
@@ -485,7 +669,7 @@ class HateSpeechDetector:
 
             # Also export as plain text (one comment per line, for LLM analysis)
             txt_file = output_path.with_suffix(".txt")
-            self._export_to_txt(export_data["comments"], txt_file)
+            self._export_to_txt(sorted_comments, txt_file)
 
             return True
 
@@ -503,13 +687,12 @@ class HateSpeechDetector:
         """
         try:
             with open(txt_file, "w", encoding="utf-8") as f:
-                for comment in comments:
-                    text = comment.get("text", "")
-                    text = (
-                        text.replace("\r\n", " ").replace("\n", " ").replace("\r", " ")
-                    )
-                    text = " ".join(text.split())
-                    f.write(text + "\n")
+                # str.split() already breaks on \r and \n, so one split/join
+                # flattens line breaks and collapses whitespace in a single pass
+                f.writelines(
+                    " ".join(comment.get("text", "").split()) + "\n"
+                    for comment in comments
+                )
 
             print(f"✓ Plain text export (for LLM): {txt_file}")
 
@@ -0,0 +1,113 @@
+"""
+JSON file helpers shared by the collectors and analyzers.
+
+orjson is used when it is installed, the stdlib json module otherwise; both
+produce the same UTF-8 output layout.
+"""
+
+import json
+import mmap
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Files at least this large are parsed straight from an mmap (no extra bytes copy)
+_MMAP_MIN_SIZE = 1 << 20
+
+
+def dumps(obj, indent: bool = True) -> bytes:
+    """Serialize obj as UTF-8 JSON, 2-space indented unless indent is False."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    # Compact like orjson (the stdlib default puts a space after , and :)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_indented(obj, level: int = 0) -> bytes:
+    """Serialize obj as 2-space indented JSON nested `level` levels deep."""
+    data = dumps(obj)
+    # JSON strings never contain raw newlines, so this only shifts structure
+    return data.replace(b"\n", b"\n" + b"  " * level)
+
+
+def read_json(path: Path):
+    """Read a JSON file."""
+    if orjson is not None:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < _MMAP_MIN_SIZE:
+                return orjson.loads(f.read())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as buf:
+                    return orjson.loads(buf)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+@contextmanager
+def atomic_open(path: Path):
+    """
+    Open a temp file for binary writing that replaces `path` on success.
+
+    The data is flushed to disk before the temp file atomically replaces
+    the target, so even a power loss leaves either the old or the new file.
+    If the block raises, the temp file is removed and `path` is untouched.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def write_json(path: Path, obj, indent: bool = True):
+    """Write a JSON file, atomically (see atomic_open)."""
+    data = dumps(obj, indent)
+    with atomic_open(path) as f:
+        f.write(data)
+
+
+def append_jsonl(path: Path, records):
+    """Append records to a JSON Lines file, one compact JSON object per line."""
+    data = b"".join(dumps(record, indent=False) + b"\n" for record in records)
+    with open(path, "ab") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def read_jsonl(path: Path) -> list:
+    """
+    Read a JSON Lines file ([] if it does not exist).
+
+    A line cut short by an interrupted append is skipped.
+    """
+    try:
+        with open(path, "rb") as f:
+            lines = f.read().splitlines()
+    except FileNotFoundError:
+        return []
+
+    loads = orjson.loads if orjson is not None else json.loads
+    records = []
+    for line in lines:
+        try:
+            records.append(loads(line))
+        except ValueError:
+            continue
+    return records
@@ -3,12 +3,48 @@ Political alignment analysis module using LM Studio local LLM API.
 """
 
 from typing import List, Dict
+from pathlib import Path
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import os
+import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 from tqdm import tqdm
 
+from src.jsonio import append_jsonl, read_jsonl
+
+# "<number>:<category>" answer lines
+_ANSWER_LINE_RE = re.compile(r"^[^\S\n]*([+-]?\d+)[^\S\n]*:(.*)$", re.MULTILINE)
+
+# Preamble the model may generate before the answer lines
+_PREAMBLE_RE = re.compile(r"here is|analysis|based on", re.IGNORECASE)
+
+# Prompt text before and after the numbered comments
+_PROMPT_HEAD = """Classify the political stance of each comment.
+
+COMMENTS:
+"""
+
+_PROMPT_TAIL = """
+
+CATEGORIES:
+- pro_ukraine (supporting Ukraine, criticizing Russia)
+- pro_russia (supporting Russia, criticizing Ukraine)
+- neutral (neutral stance)
+
+Response format (strict):
+{format_lines}
+
+Example:
+1:pro_ukraine
+2:neutral
+3:pro_russia
+
+Your response (NO explanations):"""
+
 
 class PoliticalAnalyzer:
     """Classifies comments as pro_ukraine, pro_russia, or neutral via LM Studio API."""
@@ -19,12 +55,34 @@ class PoliticalAnalyzer:
             "LM_STUDIO_API_URL", "http://localhost:1234/v1/chat/completions"
         )
         self.batch_size = batch_size or int(os.getenv("BATCH_SIZE", "5"))
+        self._prompt_tails = {}
+        self.concurrency = max(1, int(os.getenv("POLITICAL_CONCURRENCY", "1")))
+
+        # Keep-alive connections, one per in-flight batch
+        self.session = requests.Session()
+        # Transient gateway errors (LM Studio restarting/loading a model) are
+        # retried with backoff before a batch falls back to neutral
+        retries = Retry(
+            total=2,
+            backoff_factor=0.2,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=["GET", "POST"],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.concurrency,
+            pool_maxsize=self.concurrency,
+            max_retries=retries,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
         self._check_api_connection()
 
     def _check_api_connection(self):
         """Verify connection to LM Studio API."""
         try:
-            response = requests.get(
+            response = self.session.get(
                 self.api_url.replace("/v1/chat/completions", "/v1/models"), timeout=5
             )
             if response.status_code == 200:
@@ -53,32 +111,21 @@ class PoliticalAnalyzer:
             return []
 
         comments_text = "\n".join(
-            [f"{i + 1}. {text[:300]}" for i, text in enumerate(texts)]
+            f"{i}. {text[:300]}" for i, text in enumerate(texts, 1)
         )
-        format_lines = "\n".join([f"{i + 1}:category" for i in range(len(texts))])
-
-        prompt = f"""Classify the political stance of each comment.
-
-COMMENTS:
-{comments_text}
-
-CATEGORIES:
-- pro_ukraine (supporting Ukraine, criticizing Russia)
-- pro_russia (supporting Russia, criticizing Ukraine)
-- neutral (neutral stance)
-
-Response format (strict):
-{format_lines}
 
-Example:
-1:pro_ukraine
-2:neutral
-3:pro_russia
+        # Everything after the comments depends only on the batch length
+        prompt_tail = self._prompt_tails.get(len(texts))
+        if prompt_tail is None:
+            format_lines = "\n".join(f"{i}:category" for i in range(1, len(texts) + 1))
+            prompt_tail = self._prompt_tails[len(texts)] = _PROMPT_TAIL.format(
+                format_lines=format_lines
+            )
 
-Your response (NO explanations):"""
+        prompt = _PROMPT_HEAD + comments_text + prompt_tail
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.api_url,
                 json={
                     "messages": [{"role": "user", "content": prompt}],
@@ -101,43 +148,18 @@ Your response (NO explanations):"""
                 answer = message["reasoning"].strip()
 
             results = []
-            for line in answer.split("\n"):
-                line = line.strip()
-
-                # Skip preamble lines the model may generate
-                if (
-                    "here is" in line.lower()
-                    or "analysis" in line.lower()
-                    or "based on" in line.lower()
-                ):
-                    continue
-
-                if not line or ":" not in line:
+            for m in _ANSWER_LINE_RE.finditer(answer):
+                if _PREAMBLE_RE.search(m.group(0)):
                     continue
 
-                parts = line.split(":", 1)
-                if len(parts) == 2:
-                    try:
-                        num = int(parts[0].strip())
-                    except ValueError:
-                        continue
-
-                    category_text = parts[1].strip().lower().replace("-", "_")
-
-                    if (
-                        "pro_ukraine" in category_text
-                        or "ukraine" in category_text
-                        or "ukr" in category_text
-                    ):
-                        results.append("pro_ukraine")
-                    elif (
-                        "pro_russia" in category_text
-                        or "russia" in category_text
-                        or "rus" in category_text
-                    ):
-                        results.append("pro_russia")
-                    else:
-                        results.append("neutral")
+                # "ukr"/"rus" also cover the full pro_ukraine/pro_russia labels
+                category_text = m.group(2).lower()
+                if "ukr" in category_text:
+                    results.append("pro_ukraine")
+                elif "rus" in category_text:
+                    results.append("pro_russia")
+                else:
+                    results.append("neutral")
 
             # Pad to expected length
             while len(results) < len(texts):
@@ -149,12 +171,21 @@ Your response (NO explanations):"""
             # Fall back to neutral on error
             return ["neutral"] * len(texts)
 
-    def analyze_all_comments(self, comments: List[Dict]) -> Dict:
+    def analyze_all_comments(
+        self,
+        comments: List[Dict],
+        checkpoint_file: Path = None,
+        save_interval: int = 100,
+    ) -> Dict:
         """
         Analyze political alignment of all comments.
 
         Args:
             comments: list of comment dicts
+            checkpoint_file: JSON Lines file the labels are appended to while
+                analyzing; labels already in it (from an interrupted run) are
+                reused instead of being classified again
+            save_interval: save progress every N texts
 
         Returns:
             dict with analysis results
@@ -162,36 +193,76 @@ Your response (NO explanations):"""
         print("Analyzing political alignment via LLM...")
 
         political_by_comment = {}
-        political_by_user = defaultdict(list)
+        # Per-user label counts (the individual labels are not needed afterwards)
+        political_by_user = defaultdict(Counter)
         failed_batches = []
 
+        political_by_text = {}
+        unsaved = []
+        unsaved_texts = 0
+
+        if checkpoint_file:
+            checkpointed = {
+                record["comment_id"]: record["label"]
+                for record in read_jsonl(checkpoint_file)
+            }
+            for comment in comments:
+                political = checkpointed.get(comment["comment_id"])
+                if political is not None:
+                    political_by_text.setdefault(
+                        comment.get("text", "") or "", political
+                    )
+            if checkpointed:
+                print(f"  └─ Resuming: {len(political_by_text)} texts already labeled")
+
+        # Copy-pasted and bot comments are classified once per distinct text;
+        # checkpoint records are written per comment
+        ids_by_text = defaultdict(list)
+        for comment in comments:
+            text = comment.get("text", "") or ""
+            if text not in political_by_text:
+                ids_by_text[text].append(comment["comment_id"])
+        unique_texts = list(ids_by_text)
+
         pbar = tqdm(
-            total=len(comments),
+            total=len(unique_texts),
             desc="Political",
-            unit="comm",
+            unit="text",
             bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]",
         )
 
-        for i in range(0, len(comments), self.batch_size):
-            batch = comments[i : i + self.batch_size]
-            texts = [comment.get("text", "") or "" for comment in batch]
-
-            politicals = self._analyze_text_with_llm(texts)
-
-            if len(politicals) != len(texts):
-                print(
-                    f"\n⚠ Batch error: got {len(politicals)} results instead of {len(texts)}"
-                )
-                failed_batches.append((batch, texts))
-                politicals = ["neutral"] * len(texts)
-
-            for comment, political in zip(batch, politicals):
-                comment_id = comment["comment_id"]
-                user_id = comment["user"]["id"]
-                political_by_comment[comment_id] = political
-                political_by_user[user_id].append(political)
+        batch_texts = [
+            unique_texts[i : i + self.batch_size]
+            for i in range(0, len(unique_texts), self.batch_size)
+        ]
 
-            pbar.update(len(batch))
+        # Up to `concurrency` batches are in flight; results come back in order
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            batch_results = executor.map(self._analyze_text_with_llm, batch_texts)
+
+            for texts, politicals in zip(batch_texts, batch_results):
+                failed = len(politicals) != len(texts)
+                if failed:
+                    print(
+                        f"\n⚠ Batch error: got {len(politicals)} results instead of {len(texts)}"
+                    )
+                    failed_batches.append(texts)
+                    politicals = ["neutral"] * len(texts)
+
+                political_by_text.update(zip(texts, politicals))
+                pbar.update(len(texts))
+
+                # Fallback labels are not saved, so a resumed run retries them;
+                # progress is counted per distinct text, the unit being classified
+                if checkpoint_file and not failed:
+                    unsaved.extend(
+                        self._checkpoint_records(texts, politicals, ids_by_text)
+                    )
+                    unsaved_texts += len(texts)
+                    if unsaved_texts >= save_interval:
+                        append_jsonl(checkpoint_file, unsaved)
+                        unsaved = []
+                        unsaved_texts = 0
 
         pbar.close()
 
@@ -205,17 +276,14 @@ Your response (NO explanations):"""
                 bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt}",
             )
 
-            for batch, texts in failed_batches:
+            for texts in failed_batches:
                 politicals = self._analyze_text_with_llm(texts)
 
                 if len(politicals) == len(texts):
-                    for comment, political in zip(batch, politicals):
-                        comment_id = comment["comment_id"]
-                        user_id = comment["user"]["id"]
-                        political_by_comment[comment_id] = political
-                        political_by_user[user_id] = [
-                            p for p in political_by_user[user_id] if p != "neutral"
-                        ] + [political]
+                    political_by_text.update(zip(texts, politicals))
+                    unsaved.extend(
+                        self._checkpoint_records(texts, politicals, ids_by_text)
+                    )
                 else:
                     print(f"\n⚠ Batch failed again: {len(politicals)}/{len(texts)}")
 
@@ -224,32 +292,23 @@ Your response (NO explanations):"""
 
             retry_pbar.close()
 
-        print(f"✓ Analyzed {len(comments)} comments")
+        if checkpoint_file and unsaved:
+            append_jsonl(checkpoint_file, unsaved)
+
+        for comment in comments:
+            political = political_by_text[comment.get("text", "") or ""]
+            political_by_comment[comment["comment_id"]] = political
+            political_by_user[comment["user"]["id"]][political] += 1
+
+        print(
+            f"✓ Analyzed {len(comments)} comments ({len(political_by_text)} unique texts)"
+        )
 
         # Aggregate per-user stats
-        users_political_stats = {}
-        for user_id, politicals in political_by_user.items():
-            counter = Counter(politicals)
-            total = len(politicals)
-
-            pro_ukraine_pct = counter["pro_ukraine"] / total
-            pro_russia_pct = counter["pro_russia"] / total
-
-            # Assign dominant category if at least 20% of comments have a clear stance
-            if pro_ukraine_pct >= 0.2 and pro_ukraine_pct > pro_russia_pct:
-                dominant_category = "pro_ukraine"
-            elif pro_russia_pct >= 0.2 and pro_russia_pct > pro_ukraine_pct:
-                dominant_category = "pro_russia"
-            else:
-                dominant_category = "neutral"
-
-            users_political_stats[user_id] = {
-                "dominant": dominant_category,
-                "pro_ukraine_count": counter["pro_ukraine"],
-                "pro_russia_count": counter["pro_russia"],
-                "neutral_count": counter["neutral"],
-                "total": total,
-            }
+        users_political_stats = {
+            user_id: self._user_stats(counter)
+            for user_id, counter in political_by_user.items()
+        }
 
         return {
             "comments_political": political_by_comment,
@@ -259,15 +318,88 @@ Your response (NO explanations):"""
             ),
         }
 
+    @staticmethod
+    def _checkpoint_records(
+        texts: List[str], politicals: List[str], ids_by_text: Dict
+    ) -> List[Dict]:
+        """Checkpoint records for every comment carrying the classified texts."""
+        return [
+            {"comment_id": comment_id, "label": political}
+            for text, political in zip(texts, politicals)
+            for comment_id in ids_by_text[text]
+        ]
+
+    def _user_stats(self, counter: Counter) -> Dict:
+        """Build a user's political stats from their label counts."""
+        total = sum(counter.values())
+
+        pro_ukraine_pct = counter["pro_ukraine"] / total
+        pro_russia_pct = counter["pro_russia"] / total
+
+        # Assign dominant category if at least 20% of comments have a clear stance
+        if pro_ukraine_pct >= 0.2 and pro_ukraine_pct > pro_russia_pct:
+            dominant_category = "pro_ukraine"
+        elif pro_russia_pct >= 0.2 and pro_russia_pct > pro_ukraine_pct:
+            dominant_category = "pro_russia"
+        else:
+            dominant_category = "neutral"
+
+        return {
+            "dominant": dominant_category,
+            "pro_ukraine_count": counter["pro_ukraine"],
+            "pro_russia_count": counter["pro_russia"],
+            "neutral_count": counter["neutral"],
+            "total": total,
+        }
+
+    def merge_results(self, previous: Dict, new: Dict) -> Dict:
+        """
+        Merge results for newly analyzed comments into a previous run's results.
+
+        Args:
+            previous: results loaded from a previous run (JSON, so string keys)
+            new: results from analyze_all_comments
+
+        Returns:
+            dict with merged results, keyed by string IDs
+        """
+        comments_political = dict(previous.get("comments_political", {}))
+        comments_political.update(
+            (str(comment_id), political)
+            for comment_id, political in new["comments_political"].items()
+        )
+
+        users_political = dict(previous.get("users_political", {}))
+        for user_id, user_stats in new["users_political"].items():
+            user_id = str(user_id)
+            previous_stats = users_political.get(user_id)
+            if previous_stats is not None:
+                counter = Counter(
+                    {
+                        label: previous_stats[f"{label}_count"]
+                        + user_stats[f"{label}_count"]
+                        for label in ("pro_ukraine", "pro_russia", "neutral")
+                    }
+                )
+                user_stats = self._user_stats(counter)
+            users_political[user_id] = user_stats
+
+        return {
+            "comments_political": comments_political,
+            "users_political": users_political,
+            "total_stats": self._calculate_total_stats(
+                comments_political, users_political
+            ),
+        }
+
     def _calculate_total_stats(
         self, comments_political: Dict, users_political: Dict
     ) -> Dict:
         """Calculate aggregate statistics."""
         comments_counter = Counter(comments_political.values())
-        users_categories = [
+        users_counter = Counter(
             user_data["dominant"] for user_data in users_political.values()
-        ]
-        users_counter = Counter(users_categories)
+        )
 
         return {
             "comments": {
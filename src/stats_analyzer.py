@@ -2,11 +2,68 @@
 Comment statistics module.
 """
 
-from collections import defaultdict
+from bisect import bisect_left, bisect_right
+from collections import Counter
+import heapq
+from itertools import accumulate
+from operator import itemgetter
 from typing import List, Dict
 from pathlib import Path
 from datetime import datetime, timezone
-import json
+import sys
+
+from src.jsonio import atomic_open, dumps_indented, read_json, write_json
+
+# Labels appended by the analyzers while they run; a re-run after an
+# interruption reuses them (deleted once latest_analysis.json is saved)
+CHECKPOINT_FILES = ("toxicity_checkpoint.jsonl", "political_checkpoint.jsonl")
+
+
+def save_analysis_results(results: Dict, path: Path, comments: List[Dict] = None):
+    """
+    Write LLM analysis results to a JSON file.
+
+    The comments_with_analysis records are serialized and written one at a
+    time, so the whole document is never built in memory. The file has the
+    same layout as write_json and, like it, is replaced atomically, so an
+    interrupted save keeps the previous results.
+
+    Args:
+        results: dict returned by analyze_comments_and_save
+        path: output file
+        comments: the analyzed comments, written as comments_with_analysis
+            with their toxicity/political labels attached
+    """
+    items = list(results.items())
+    if comments is not None:
+        toxicity = results.get("toxicity_analysis", {})
+        political = results.get("political_analysis", {})
+        records = _iter_comments_with_analysis(
+            comments,
+            toxicity.get("comments_toxicity", {}),
+            political.get("comments_political", {}),
+        )
+        items = [item for item in items if item[0] != "comments_with_analysis"]
+        items.append(("comments_with_analysis", records))
+
+    with atomic_open(path) as f:
+        f.write(b"{")
+        for i, (key, value) in enumerate(items):
+            f.write(b"\n  " if i == 0 else b",\n  ")
+            f.write(dumps_indented(key) + b": ")
+
+            if key != "comments_with_analysis":
+                f.write(dumps_indented(value, 1))
+                continue
+
+            f.write(b"[")
+            empty = True
+            for comment_data in value:
+                f.write(b"\n    " if empty else b",\n    ")
+                f.write(dumps_indented(comment_data, 2))
+                empty = False
+            f.write(b"]" if empty else b"\n  ]")
+        f.write(b"\n}" if items else b"}")
 
 
 def print_basic_statistics(
@@ -32,64 +89,86 @@ def print_basic_statistics(
     total_comments = len(comments)
     unique_users = stats.get_unique_users_count()
 
-    # Comment type breakdown (YouTube)
-    top_level_comments = [c for c in comments if c.get("comment_type") == "top_level"]
-    reply_comments = [c for c in comments if c.get("comment_type") == "reply"]
-    has_comment_types = len(top_level_comments) > 0 or len(reply_comments) > 0
+    # One pass for the comment type breakdown (YouTube) and the top-10 by likes
+    top_level_count = 0
+    reply_count = 0
+    likes_heap = []  # min-heap of (likes, -index, comment), at most 10 entries
 
-    print(f"Total comments:           {total_comments}")
-    print(f"Unique users:             {unique_users}")
-    print(f"Avg comments per user:    {total_comments / unique_users:.1f}")
+    for index, comment in enumerate(comments):
+        comment_type = comment.get("comment_type")
+        if comment_type == "top_level":
+            top_level_count += 1
+        elif comment_type == "reply":
+            reply_count += 1
+
+        likes = comment.get("likes", 0)
+        if likes > 0:
+            # -index keeps the earlier comment first on equal likes
+            item = (likes, -index, comment)
+            if len(likes_heap) < 10:
+                heapq.heappush(likes_heap, item)
+            elif item > likes_heap[0]:
+                heapq.heapreplace(likes_heap, item)
+
+    has_comment_types = top_level_count > 0 or reply_count > 0
+
+    # The report is buffered and written at once rather than line by line
+    lines = []
+
+    lines.append(f"Total comments:           {total_comments}")
+    lines.append(f"Unique users:             {unique_users}")
+    lines.append(f"Avg comments per user:    {total_comments / unique_users:.1f}")
 
     if has_comment_types:
-        print("\nComment types:")
-        print(
-            f"  • Top-level: {len(top_level_comments)} ({len(top_level_comments) / total_comments * 100:.1f}%)"
+        lines.append("\nComment types:")
+        lines.append(
+            f"  • Top-level: {top_level_count} ({top_level_count / total_comments * 100:.1f}%)"
         )
-        print(
-            f"  • Replies:   {len(reply_comments)} ({len(reply_comments) / total_comments * 100:.1f}%)"
+        lines.append(
+            f"  • Replies:   {reply_count} ({reply_count / total_comments * 100:.1f}%)"
         )
 
-    all_users = stats.get_top_users(len(stats.users_comments))
+    all_users = stats.get_top_users(unique_users)
+
+    # Comments written by the N most active users, for every N
+    cumulative_comments = list(accumulate(count for _, count, _ in all_users))
 
     top_groups = [(10, "top-10"), (100, "top-100"), (1000, "top-1000")]
 
-    print("\nActivity distribution:")
+    lines.append("\nActivity distribution:")
 
     for top_n, label in top_groups:
         if len(all_users) >= top_n:
-            top_users = all_users[:top_n]
-            top_comments = sum(count for _, count, _ in top_users)
+            top_comments = cumulative_comments[top_n - 1]
             percentage = (top_comments / total_comments) * 100
-            print(f"  • {label} users: {top_comments} comments ({percentage:.1f}%)")
+            lines.append(
+                f"  • {label} users: {top_comments} comments ({percentage:.1f}%)"
+            )
 
     top_10 = all_users[:10]
-    print("\nTop-10 most active users:")
+    lines.append("\nTop-10 most active users:")
     for i, (user_id, count, username) in enumerate(top_10, 1):
         percentage = (count / total_comments) * 100
         display_name = username if username else f"User_{user_id}"
-        print(f"  {i:2d}. {display_name}: {count} comments ({percentage:.1f}%)")
+        lines.append(f"  {i:2d}. {display_name}: {count} comments ({percentage:.1f}%)")
 
     user_distribution = stats.get_user_activity_distribution()
-    print("\nUser activity distribution:")
+    lines.append("\nUser activity distribution:")
 
     for label, data in user_distribution.items():
         users_count = data["users_count"]
         percentage = data["percentage"]
 
         if users_count > 0:
-            print(f"  • {label:20s}: {users_count:5d} users ({percentage:5.1f}%)")
+            lines.append(
+                f"  • {label:20s}: {users_count:5d} users ({percentage:5.1f}%)"
+            )
 
     # Top comments by likes (if available)
-    comments_with_likes = [
-        c for c in comments if "likes" in c and c.get("likes", 0) > 0
-    ]
-    if comments_with_likes:
-        top_comments_by_likes = sorted(
-            comments_with_likes, key=lambda x: x.get("likes", 0), reverse=True
-        )[:10]
+    if likes_heap:
+        top_comments_by_likes = [c for _, _, c in sorted(likes_heap, reverse=True)]
 
-        print("\nTop-10 comments by likes:")
+        lines.append("\nTop-10 comments by likes:")
         for i, comment in enumerate(top_comments_by_likes, 1):
             likes = comment.get("likes", 0)
             username = (
@@ -102,33 +181,33 @@ def print_basic_statistics(
                 if len(comment["text"]) > 80
                 else comment["text"]
             )
-            print(f"  {i:2d}. {username:30s} - {likes:5d} likes")
-            print(f"      {text}")
+            lines.append(f"  {i:2d}. {username:30s} - {likes:5d} likes")
+            lines.append(f"      {text}")
 
-    print("\nActivity concentration (percentiles):")
+    lines.append("\nActivity concentration (percentiles):")
     percentiles = [20, 40, 60, 80, 100]
     percentile_results = {}
 
     for percentile in percentiles:
         target_comments = (percentile / 100) * total_comments
 
-        cumulative_comments = 0
-        users_count = 0
-
-        while cumulative_comments < target_comments and users_count < len(all_users):
-            _, count, _ = all_users[users_count]
-            cumulative_comments += count
-            users_count += 1
+        # Fewest top users whose comments reach the target
+        users_count = min(
+            bisect_left(cumulative_comments, target_comments) + 1,
+            len(cumulative_comments),
+        )
 
         percentile_results[percentile] = {
             "users_count": users_count,
             "percentage_of_users": (users_count / unique_users) * 100,
         }
 
-        print(
+        lines.append(
             f"  • {percentile:3d}% of comments written by {users_count:4d} most active users ({percentile_results[percentile]['percentage_of_users']:.1f}% of all)"
         )
 
+    sys.stdout.write("\n".join(lines) + "\n")
+
     # Hate speech analysis
     from src.hate_speech_detector import HateSpeechDetector
 
@@ -164,8 +243,7 @@ def print_basic_statistics(
 
     for top_n, label in top_groups:
         if len(all_users) >= top_n:
-            top_users = all_users[:top_n]
-            top_comments = sum(count for _, count, _ in top_users)
+            top_comments = cumulative_comments[top_n - 1]
             result["top_groups"][label] = {
                 "users_count": top_n,
                 "comments_count": top_comments,
@@ -186,8 +264,7 @@ def print_basic_statistics(
 
     if save_dir:
         stats_file = save_dir / "basic_statistics.json"
-        with open(stats_file, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+        write_json(stats_file, result)
         print(f"\n✓ Basic statistics saved: {stats_file}")
 
     return result
@@ -198,18 +275,28 @@ class CommentsStatistics:
 
     def __init__(self, comments: List[Dict]):
         self.comments = comments
-        self.users_comments = defaultdict(list)
+        self.user_counts = Counter()
+        self.user_names = {}
+        self._top_users_cache = {}
         self._group_comments_by_user()
 
     def _group_comments_by_user(self):
-        """Group comments by user ID."""
-        for comment in self.comments:
-            user_id = comment["user"]["id"]
-            self.users_comments[user_id].append(comment)
+        """Count comments per user ID and resolve each user's display name."""
+        # Only counts and one user record are needed per user, not the comments
+        self.user_counts = Counter(comment["user"]["id"] for comment in self.comments)
+        # Iterating in reverse lets the earliest comment's record win
+        first_user = {
+            comment["user"]["id"]: comment["user"]
+            for comment in reversed(self.comments)
+        }
+        self.user_names = {
+            user_id: user.get("username") or user.get("first_name") or "Anonymous"
+            for user_id, user in first_user.items()
+        }
 
     def get_unique_users_count(self) -> int:
         """Return number of unique users."""
-        return len(self.users_comments)
+        return len(self.user_counts)
 
     def get_top_users(self, limit=100) -> List[tuple]:
         """
@@ -221,17 +308,17 @@ class CommentsStatistics:
         Returns:
             List of (user_id, comment_count, username) tuples sorted by count descending
         """
-        users_count = []
-        for user_id, comments in self.users_comments.items():
-            username = (
-                comments[0]["user"].get("username")
-                or comments[0]["user"].get("first_name")
-                or "Anonymous"
-            )
-            users_count.append((user_id, len(comments), username))
+        cached = self._top_users_cache.get(limit)
+        if cached is not None:
+            return list(cached)
 
-        users_count.sort(key=lambda x: x[1], reverse=True)
-        return users_count[:limit]
+        top = heapq.nlargest(limit, self.user_counts.items(), key=itemgetter(1))
+
+        names = self.user_names
+        users_count = [(user_id, count, names[user_id]) for user_id, count in top]
+
+        self._top_users_cache[limit] = users_count
+        return list(users_count)
 
     def get_total_comments_from_top_users(self, top_users: List[tuple]) -> int:
         """Return total comment count from a list of top users."""
@@ -244,8 +331,9 @@ class CommentsStatistics:
         Returns:
             Dict mapping group labels to {users_count, percentage}
         """
-        comments_per_user = [len(comments) for comments in self.users_comments.values()]
-        total_users = len(comments_per_user)
+        total_users = len(self.user_counts)
+        # Users per exact comment count; far fewer keys than users
+        users_by_count = Counter(self.user_counts.values())
 
         groups = [
             (1, 1, "1 comment"),
@@ -262,10 +350,16 @@ class CommentsStatistics:
             (501, float("inf"), "501+ comments"),
         ]
 
+        # Groups are contiguous, so each count falls in the last group whose
+        # minimum it reaches
+        group_mins = [min_val for min_val, _, _ in groups]
+        group_counts = [0] * len(groups)
+        for comments_count, n in users_by_count.items():
+            group_counts[bisect_right(group_mins, comments_count) - 1] += n
+
         distribution = {}
 
-        for min_val, max_val, label in groups:
-            count = sum(1 for c in comments_per_user if min_val <= c <= max_val)
+        for (_, _, label), count in zip(groups, group_counts):
             percentage = (count / total_users * 100) if total_users > 0 else 0
 
             distribution[label] = {"users_count": count, "percentage": percentage}
@@ -274,22 +368,25 @@ class CommentsStatistics:
 
     def print_basic_stats(self):
         """Print basic statistics summary."""
-        print("\nBASIC STATISTICS:")
-        print(f"  • Total comments: {len(self.comments)}")
-        print(f"  • Unique users:   {self.get_unique_users_count()}")
+        lines = []
+        lines.append("\nBASIC STATISTICS:")
+        lines.append(f"  • Total comments: {len(self.comments)}")
+        lines.append(f"  • Unique users:   {self.get_unique_users_count()}")
 
         top_users = self.get_top_users(100)
         total_top = self.get_total_comments_from_top_users(top_users)
 
-        print("\nTOP-100 USERS:")
-        print(f"  • Total comments from top-100: {total_top}")
-        print(
+        lines.append("\nTOP-100 USERS:")
+        lines.append(f"  • Total comments from top-100: {total_top}")
+        lines.append(
             f"  • Percentage of all comments:  {total_top / len(self.comments) * 100:.1f}%"
         )
 
-        print("\nTop-10 most active:")
+        lines.append("\nTop-10 most active:")
         for i, (user_id, count, username) in enumerate(top_users[:10], 1):
-            print(f"  {i}. {username} (ID: {user_id}): {count} comments")
+            lines.append(f"  {i}. {username} (ID: {user_id}): {count} comments")
+
+        sys.stdout.write("\n".join(lines) + "\n")
 
 
 def analyze_comments_and_save(
@@ -308,12 +405,16 @@ def analyze_comments_and_save(
         force_reanalysis: if True, ignore existing results and reanalyze everything
 
     Returns:
-        dict with analysis results
+        dict with analysis results; pass it with the same comments to
+        save_analysis_results to write the per-comment records
     """
     if not comments:
         print("✗ No comments to analyze")
         return {}
 
+    # Run start time, shared by the final results and the intermediate files
+    timestamp = datetime.now(timezone.utc).isoformat()
+
     existing_results = {}
     analyzed_comment_ids = set()
 
@@ -324,17 +425,20 @@ def analyze_comments_and_save(
             if analysis_file.exists():
                 analysis_file.unlink()
                 print("  └─ Previous results deleted")
+            for name in CHECKPOINT_FILES:
+                (save_dir / name).unlink(missing_ok=True)
     elif save_dir:
         analysis_file = save_dir / "latest_analysis.json"
         if analysis_file.exists():
             try:
-                with open(analysis_file, "r", encoding="utf-8") as f:
-                    existing_results = json.load(f)
+                existing_results = read_json(analysis_file)
 
                 if "comments_with_analysis" in existing_results:
-                    for comment_data in existing_results["comments_with_analysis"]:
-                        if "toxicity" in comment_data and "political" in comment_data:
-                            analyzed_comment_ids.add(comment_data["comment_id"])
+                    analyzed_comment_ids = {
+                        comment_data["comment_id"]
+                        for comment_data in existing_results["comments_with_analysis"]
+                        if "toxicity" in comment_data and "political" in comment_data
+                    }
 
                     if analyzed_comment_ids:
                         print("\nResuming from previous run:")
@@ -349,9 +453,17 @@ def analyze_comments_and_save(
                 existing_results = {}
                 analyzed_comment_ids = set()
 
-    comments_to_analyze = [
-        c for c in comments if c["comment_id"] not in analyzed_comment_ids
-    ]
+    # Without a previous run there is nothing to filter out
+    if analyzed_comment_ids:
+        comments_to_analyze = [
+            c for c in comments if c["comment_id"] not in analyzed_comment_ids
+        ]
+    else:
+        comments_to_analyze = comments
+
+    # The per-comment records are rebuilt from `comments` by
+    # save_analysis_results; don't keep the previous ones in memory
+    existing_results.pop("comments_with_analysis", None)
 
     if not comments_to_analyze:
         print("\n✓ All comments already analyzed.")
@@ -370,39 +482,24 @@ def analyze_comments_and_save(
     print("=" * 60)
 
     toxicity_analyzer = ToxicityAnalyzer()
-    new_toxicity_results = toxicity_analyzer.analyze_all_comments(comments_to_analyze)
+    new_toxicity_results = toxicity_analyzer.analyze_all_comments(
+        comments_to_analyze,
+        checkpoint_file=save_dir / "toxicity_checkpoint.jsonl" if save_dir else None,
+        save_interval=save_interval,
+    )
 
     # Merge with existing results
     if existing_results and "toxicity_analysis" in existing_results:
-        toxicity_by_comment = existing_results["toxicity_analysis"].get(
-            "toxicity_by_comment", {}
+        toxicity_results = toxicity_analyzer.merge_results(
+            existing_results["toxicity_analysis"], new_toxicity_results
         )
-        toxicity_by_user = existing_results["toxicity_analysis"].get(
-            "toxicity_by_user", {}
-        )
-
-        toxicity_by_comment.update(new_toxicity_results.get("toxicity_by_comment", {}))
-        for user_id, toxicities in new_toxicity_results.get(
-            "toxicity_by_user", {}
-        ).items():
-            if user_id in toxicity_by_user:
-                toxicity_by_user[user_id].extend(toxicities)
-            else:
-                toxicity_by_user[user_id] = toxicities
-
-        toxicity_results = {
-            "toxicity_by_comment": toxicity_by_comment,
-            "toxicity_by_user": toxicity_by_user,
-            "users_stats": new_toxicity_results.get("users_stats", {}),
-        }
     else:
         toxicity_results = new_toxicity_results
 
     # Save intermediate toxicity results
     if save_dir:
         temp_file = save_dir / "toxicity_temp.json"
-        with open(temp_file, "w", encoding="utf-8") as f:
-            json.dump(toxicity_results, f, ensure_ascii=False, indent=2)
+        write_json(temp_file, {"timestamp": timestamp, **toxicity_results})
 
     toxicity_analyzer.print_toxicity_stats(toxicity_results)
 
@@ -414,41 +511,24 @@ def analyze_comments_and_save(
     print("=" * 60)
 
     political_analyzer = PoliticalAnalyzer()
-    new_political_results = political_analyzer.analyze_all_comments(comments_to_analyze)
+    new_political_results = political_analyzer.analyze_all_comments(
+        comments_to_analyze,
+        checkpoint_file=save_dir / "political_checkpoint.jsonl" if save_dir else None,
+        save_interval=save_interval,
+    )
 
     # Merge with existing results
     if existing_results and "political_analysis" in existing_results:
-        political_by_comment = existing_results["political_analysis"].get(
-            "political_by_comment", {}
-        )
-        political_by_user = existing_results["political_analysis"].get(
-            "political_by_user", {}
-        )
-
-        political_by_comment.update(
-            new_political_results.get("political_by_comment", {})
+        political_results = political_analyzer.merge_results(
+            existing_results["political_analysis"], new_political_results
         )
-        for user_id, politicals in new_political_results.get(
-            "political_by_user", {}
-        ).items():
-            if user_id in political_by_user:
-                political_by_user[user_id].extend(politicals)
-            else:
-                political_by_user[user_id] = politicals
-
-        political_results = {
-            "political_by_comment": political_by_comment,
-            "political_by_user": political_by_user,
-            "users_stats": new_political_results.get("users_stats", {}),
-        }
     else:
         political_results = new_political_results
 
     # Save intermediate political results
     if save_dir:
         temp_file = save_dir / "political_temp.json"
-        with open(temp_file, "w", encoding="utf-8") as f:
-            json.dump(political_results, f, ensure_ascii=False, indent=2)
+        write_json(temp_file, {"timestamp": timestamp, **political_results})
 
     political_analyzer.print_political_stats(political_results)
 
@@ -456,6 +536,7 @@ def analyze_comments_and_save(
     top_users = stats.get_top_users(100)
 
     results = {
+        "timestamp": timestamp,
         "total_comments": len(comments),
         "unique_users": stats.get_unique_users_count(),
         "top_100_users": [
@@ -465,21 +546,27 @@ def analyze_comments_and_save(
         "top_100_total": stats.get_total_comments_from_top_users(top_users),
         "toxicity_analysis": toxicity_results,
         "political_analysis": political_results,
-        "comments_with_analysis": [],
     }
 
+    return results
+
+
+def _iter_comments_with_analysis(
+    comments: List[Dict], comments_toxicity: Dict, comments_political: Dict
+):
+    """Yield each comment with its toxicity/political labels attached."""
     for comment in comments:
-        comment_data = comment.copy()
         comment_id = comment["comment_id"]
+        # Results merged with a previous run are keyed by string IDs (as in JSON)
+        if comment_id not in comments_toxicity:
+            comment_id = str(comment_id)
+        extras = {}
 
-        if comment_id in toxicity_results.get("comments_toxicity", {}):
-            comment_data["toxicity"] = toxicity_results["comments_toxicity"][comment_id]
-
-        if comment_id in political_results.get("comments_political", {}):
-            comment_data["political"] = political_results["comments_political"][
-                comment_id
-            ]
+        if comment_id in comments_toxicity:
+            extras["toxicity"] = comments_toxicity[comment_id]
 
-        results["comments_with_analysis"].append(comment_data)
+        if comment_id in comments_political:
+            extras["political"] = comments_political[comment_id]
 
-    return results
+        # Merged records exist only while being written, one at a time
+        yield {**comment, **extras} if extras else comment
@@ -3,12 +3,48 @@ Toxicity analysis module using LM Studio local LLM API.
 """
 
 from typing import List, Dict
+from pathlib import Path
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import os
+import re
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 from tqdm import tqdm
 
+from src.jsonio import append_jsonl, read_jsonl
+
+# "<number>:<category>" answer lines
+_ANSWER_LINE_RE = re.compile(r"^[^\S\n]*([+-]?\d+)[^\S\n]*:(.*)$", re.MULTILINE)
+
+# Preamble the model may generate before the answer lines
+_PREAMBLE_RE = re.compile(r"here is|analysis|based on", re.IGNORECASE)
+
+# Prompt text before and after the numbered comments
+_PROMPT_HEAD = """Classify the toxicity of each comment.
+
+COMMENTS:
+"""
+
+_PROMPT_TAIL = """
+
+CATEGORIES:
+- toxic (insults, profanity, threats)
+- friendly (gratitude, praise)
+- neutral (neutral)
+
+Response format (strict):
+{format_lines}
+
+Example:
+1:toxic
+2:neutral
+3:friendly
+
+Your response (NO explanations):"""
+
 
 class ToxicityAnalyzer:
     """Classifies comments as toxic, neutral, or friendly via LM Studio API."""
@@ -19,12 +55,34 @@ class ToxicityAnalyzer:
             "LM_STUDIO_API_URL", "http://localhost:1234/v1/chat/completions"
         )
         self.batch_size = batch_size or int(os.getenv("BATCH_SIZE", "5"))
+        self._prompt_tails = {}
+        self.concurrency = max(1, int(os.getenv("TOXICITY_CONCURRENCY", "1")))
+
+        # Keep-alive connections, one per in-flight batch
+        self.session = requests.Session()
+        # Transient gateway errors (LM Studio restarting/loading a model) are
+        # retried with backoff before a batch falls back to neutral
+        retries = Retry(
+            total=2,
+            backoff_factor=0.2,
+            status_forcelist=[502, 503, 504],
+            allowed_methods=["GET", "POST"],
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.concurrency,
+            pool_maxsize=self.concurrency,
+            max_retries=retries,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
         self._check_api_connection()
 
     def _check_api_connection(self):
         """Verify connection to LM Studio API."""
         try:
-            response = requests.get(
+            response = self.session.get(
                 self.api_url.replace("/v1/chat/completions", "/v1/models"), timeout=5
             )
             if response.status_code == 200:
@@ -53,32 +111,21 @@ class ToxicityAnalyzer:
             return []
 
         comments_text = "\n".join(
-            [f"{i + 1}. {text[:300]}" for i, text in enumerate(texts)]
+            f"{i}. {text[:300]}" for i, text in enumerate(texts, 1)
         )
-        format_lines = "\n".join([f"{i + 1}:category" for i in range(len(texts))])
-
-        prompt = f"""Classify the toxicity of each comment.
 
-COMMENTS:
-{comments_text}
-
-CATEGORIES:
-- toxic (insults, profanity, threats)
-- friendly (gratitude, praise)
-- neutral (neutral)
-
-Response format (strict):
-{format_lines}
+        # Everything after the comments depends only on the batch length
+        prompt_tail = self._prompt_tails.get(len(texts))
+        if prompt_tail is None:
+            format_lines = "\n".join(f"{i}:category" for i in range(1, len(texts) + 1))
+            prompt_tail = self._prompt_tails[len(texts)] = _PROMPT_TAIL.format(
+                format_lines=format_lines
+            )
 
-Example:
-1:toxic
-2:neutral
-3:friendly
-
-Your response (NO explanations):"""
+        prompt = _PROMPT_HEAD + comments_text + prompt_tail
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.api_url,
                 json={
                     "messages": [{"role": "user", "content": prompt}],
@@ -101,35 +148,18 @@ Your response (NO explanations):"""
                 answer = message["reasoning"].strip()
 
             results = []
-            for line in answer.split("\n"):
-                line = line.strip()
-
-                # Skip preamble lines the model may generate
-                if (
-                    "here is" in line.lower()
-                    or "analysis" in line.lower()
-                    or "based on" in line.lower()
-                ):
-                    continue
-
-                if not line or ":" not in line:
+            for m in _ANSWER_LINE_RE.finditer(answer):
+                if _PREAMBLE_RE.search(m.group(0)):
                     continue
 
-                parts = line.split(":", 1)
-                if len(parts) == 2:
-                    try:
-                        num = int(parts[0].strip())
-                    except ValueError:
-                        continue
-
-                    category_text = parts[1].strip().lower()
-
-                    if "toxic" in category_text:
-                        results.append("toxic")
-                    elif "friendly" in category_text or "friend" in category_text:
-                        results.append("friendly")
-                    else:
-                        results.append("neutral")
+                # "friend" also covers the full "friendly" label
+                category_text = m.group(2).lower()
+                if "toxic" in category_text:
+                    results.append("toxic")
+                elif "friend" in category_text:
+                    results.append("friendly")
+                else:
+                    results.append("neutral")
 
             # Pad to expected length
             while len(results) < len(texts):
@@ -141,12 +171,21 @@ Your response (NO explanations):"""
             # Fall back to neutral on error
             return ["neutral"] * len(texts)
 
-    def analyze_all_comments(self, comments: List[Dict]) -> Dict:
+    def analyze_all_comments(
+        self,
+        comments: List[Dict],
+        checkpoint_file: Path = None,
+        save_interval: int = 100,
+    ) -> Dict:
         """
         Analyze toxicity of all comments.
 
         Args:
             comments: list of comment dicts
+            checkpoint_file: JSON Lines file the labels are appended to while
+                analyzing; labels already in it (from an interrupted run) are
+                reused instead of being classified again
+            save_interval: save progress every N comments
 
         Returns:
             dict with analysis results
@@ -154,36 +193,77 @@ Your response (NO explanations):"""
         print("Analyzing toxicity via LLM...")
 
         toxicity_by_comment = {}
-        toxicity_by_user = defaultdict(list)
+        # Per-user label counts (the individual labels are not needed afterwards)
+        toxicity_by_user = defaultdict(Counter)
         failed_batches = []
+        unsaved = []
+
+        checkpointed = {}
+        if checkpoint_file:
+            checkpointed = {
+                record["comment_id"]: record["label"]
+                for record in read_jsonl(checkpoint_file)
+            }
+
+        pending = []
+        for comment in comments:
+            toxicity = checkpointed.get(comment["comment_id"])
+            if toxicity is None:
+                pending.append(comment)
+                continue
+            toxicity_by_comment[comment["comment_id"]] = toxicity
+            toxicity_by_user[comment["user"]["id"]][toxicity] += 1
+
+        if len(pending) < len(comments):
+            print(
+                f"  └─ Resuming: {len(comments) - len(pending)} comments already labeled"
+            )
 
         pbar = tqdm(
-            total=len(comments),
+            total=len(pending),
             desc="Toxicity",
             unit="comm",
             bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]",
         )
 
-        for i in range(0, len(comments), self.batch_size):
-            batch = comments[i : i + self.batch_size]
-            texts = [comment.get("text", "") or "" for comment in batch]
-
-            toxicities = self._analyze_text_with_llm(texts)
-
-            if len(toxicities) != len(texts):
-                print(
-                    f"\n⚠ Batch error: got {len(toxicities)} results instead of {len(texts)}"
-                )
-                failed_batches.append((batch, texts))
-                toxicities = ["neutral"] * len(texts)
-
-            for comment, toxicity in zip(batch, toxicities):
-                comment_id = comment["comment_id"]
-                user_id = comment["user"]["id"]
-                toxicity_by_comment[comment_id] = toxicity
-                toxicity_by_user[user_id].append(toxicity)
+        batches = [
+            pending[i : i + self.batch_size]
+            for i in range(0, len(pending), self.batch_size)
+        ]
+        batch_texts = [
+            [comment.get("text", "") or "" for comment in batch] for batch in batches
+        ]
 
-            pbar.update(len(batch))
+        # Up to `concurrency` batches are in flight; results come back in order
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            batch_results = executor.map(self._analyze_text_with_llm, batch_texts)
+
+            for batch, texts, toxicities in zip(batches, batch_texts, batch_results):
+                failed = len(toxicities) != len(texts)
+                if failed:
+                    print(
+                        f"\n⚠ Batch error: got {len(toxicities)} results instead of {len(texts)}"
+                    )
+                    failed_batches.append((batch, texts))
+                    toxicities = ["neutral"] * len(texts)
+
+                for comment, toxicity in zip(batch, toxicities):
+                    comment_id = comment["comment_id"]
+                    user_id = comment["user"]["id"]
+                    toxicity_by_comment[comment_id] = toxicity
+                    toxicity_by_user[user_id][toxicity] += 1
+
+                pbar.update(len(batch))
+
+                # Fallback labels are not saved, so a resumed run retries them
+                if checkpoint_file and not failed:
+                    unsaved.extend(
+                        {"comment_id": comment["comment_id"], "label": toxicity}
+                        for comment, toxicity in zip(batch, toxicities)
+                    )
+                    if len(unsaved) >= save_interval:
+                        append_jsonl(checkpoint_file, unsaved)
+                        unsaved = []
 
         pbar.close()
 
@@ -204,10 +284,12 @@ Your response (NO explanations):"""
                     for comment, toxicity in zip(batch, toxicities):
                         comment_id = comment["comment_id"]
                         user_id = comment["user"]["id"]
+                        # Swap out only this comment's fallback label
+                        user_counter = toxicity_by_user[user_id]
+                        user_counter[toxicity_by_comment[comment_id]] -= 1
+                        user_counter[toxicity] += 1
                         toxicity_by_comment[comment_id] = toxicity
-                        toxicity_by_user[user_id] = [
-                            t for t in toxicity_by_user[user_id] if t != "neutral"
-                        ] + [toxicity]
+                        unsaved.append({"comment_id": comment_id, "label": toxicity})
                 else:
                     print(f"\n⚠ Batch failed again: {len(toxicities)}/{len(texts)}")
 
@@ -216,22 +298,16 @@ Your response (NO explanations):"""
 
             retry_pbar.close()
 
+        if checkpoint_file and unsaved:
+            append_jsonl(checkpoint_file, unsaved)
+
         print(f"✓ Analyzed {len(comments)} comments")
 
         # Aggregate per-user stats
-        users_toxicity_stats = {}
-        for user_id, toxicities in toxicity_by_user.items():
-            counter = Counter(toxicities)
-            total = len(toxicities)
-            dominant_category = counter.most_common(1)[0][0]
-
-            users_toxicity_stats[user_id] = {
-                "dominant": dominant_category,
-                "toxic_count": counter["toxic"],
-                "neutral_count": counter["neutral"],
-                "friendly_count": counter["friendly"],
-                "total": total,
-            }
+        users_toxicity_stats = {
+            user_id: self._user_stats(counter)
+            for user_id, counter in toxicity_by_user.items()
+        }
 
         return {
             "comments_toxicity": toxicity_by_comment,
@@ -241,15 +317,64 @@ Your response (NO explanations):"""
             ),
         }
 
+    def _user_stats(self, counter: Counter) -> Dict:
+        """Build a user's toxicity stats from their label counts."""
+        return {
+            "dominant": counter.most_common(1)[0][0],
+            "toxic_count": counter["toxic"],
+            "neutral_count": counter["neutral"],
+            "friendly_count": counter["friendly"],
+            "total": sum(counter.values()),
+        }
+
+    def merge_results(self, previous: Dict, new: Dict) -> Dict:
+        """
+        Merge results for newly analyzed comments into a previous run's results.
+
+        Args:
+            previous: results loaded from a previous run (JSON, so string keys)
+            new: results from analyze_all_comments
+
+        Returns:
+            dict with merged results, keyed by string IDs
+        """
+        comments_toxicity = dict(previous.get("comments_toxicity", {}))
+        comments_toxicity.update(
+            (str(comment_id), toxicity)
+            for comment_id, toxicity in new["comments_toxicity"].items()
+        )
+
+        users_toxicity = dict(previous.get("users_toxicity", {}))
+        for user_id, user_stats in new["users_toxicity"].items():
+            user_id = str(user_id)
+            previous_stats = users_toxicity.get(user_id)
+            if previous_stats is not None:
+                counter = Counter(
+                    {
+                        label: previous_stats[f"{label}_count"]
+                        + user_stats[f"{label}_count"]
+                        for label in ("toxic", "neutral", "friendly")
+                    }
+                )
+                user_stats = self._user_stats(counter)
+            users_toxicity[user_id] = user_stats
+
+        return {
+            "comments_toxicity": comments_toxicity,
+            "users_toxicity": users_toxicity,
+            "total_stats": self._calculate_total_stats(
+                comments_toxicity, users_toxicity
+            ),
+        }
+
     def _calculate_total_stats(
         self, comments_toxicity: Dict, users_toxicity: Dict
     ) -> Dict:
         """Calculate aggregate statistics."""
         comments_counter = Counter(comments_toxicity.values())
-        users_categories = [
+        users_counter = Counter(
             user_data["dominant"] for user_data in users_toxicity.values()
-        ]
-        users_counter = Counter(users_categories)
+        )
 
         return {
             "comments": {
@@ -3,16 +3,63 @@ YouTube comment collector using YouTube Data API v3.
 """
 
 import asyncio
-from typing import List, Dict, Optional
+import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timezone, timedelta
+from pathlib import Path
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
+from googleapiclient.model import JsonModel
 
-from src.collectors import CommentsCollector, ChannelDataManager
+from src.collectors import AsyncTokenBucket, CommentsCollector, ChannelDataManager
+from src.jsonio import orjson, read_json, write_json
 
 # Max age of a video to still update its comments
 MAX_VIDEO_AGE_DAYS = 365
 
+# API requests in flight at once
+YOUTUBE_CONCURRENCY = max(1, int(os.getenv("YT_CONCURRENCY", "16")))
+
+# Max API requests per second (0 = unlimited)
+YOUTUBE_REQUEST_RATE = float(os.getenv("YT_REQUEST_RATE", "20"))
+
+# Rate limiting and transient server errors are retried with exponential
+# backoff; other errors (e.g. 403 comments disabled / quota exceeded) are final
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_ATTEMPTS = 5
+MAX_BACKOFF = 30.0
+
+# Cache files kept in the channel's data directory:
+# resolved @handle -> channel ID (a search costs 100 quota units)
+HANDLES_CACHE_NAME = "handles.json"
+HANDLES_CACHE_TTL = timedelta(days=30)
+
+# ETags of the channel and playlist pages last fetched, with the videos the
+# pages listed; revalidated with If-None-Match so unchanged ones come back as
+# an empty 304
+ETAGS_CACHE_NAME = "etags.json"
+
+# Video fields get_posts takes from a playlist page (and keeps in etags.json)
+VIDEO_FIELDS = ("id", "title", "description", "date", "thumbnail")
+
+
+class _OrjsonModel(JsonModel):
+    """JsonModel that parses API responses with orjson."""
+
+    def deserialize(self, content):
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # Non-JSON bodies are handled (returned as text) by JsonModel
+            return super().deserialize(content)
+        if self._data_wrapper and "data" in body:
+            body = body["data"]
+        return body
+
 
 class YoutubeCommentsCollector(CommentsCollector):
     """Collects comments from YouTube channels via YouTube Data API v3."""
@@ -24,38 +71,177 @@ class YoutubeCommentsCollector(CommentsCollector):
         """
         self.api_key = api_key
         self.youtube = None
+        self._semaphore = asyncio.Semaphore(YOUTUBE_CONCURRENCY)
+        self._local = threading.local()
+        self._executor = None
+        self._users = {}
+        self._bucket = AsyncTokenBucket(
+            YOUTUBE_REQUEST_RATE, capacity=max(1.0, YOUTUBE_REQUEST_RATE)
+        )
 
     async def connect(self):
-        """Initialize YouTube API client."""
+        """Initialize YouTube API client (no-op if already connected)."""
+        if self.youtube is not None:
+            return
+
         try:
-            self.youtube = build("youtube", "v3", developerKey=self.api_key)
+            self.youtube = build(
+                "youtube",
+                "v3",
+                developerKey=self.api_key,
+                model=_OrjsonModel() if orjson is not None else None,
+            )
+            # Own worker threads for blocking API calls, one per request slot
+            # (the default executor may have fewer than YT_CONCURRENCY)
+            self._executor = ThreadPoolExecutor(
+                max_workers=YOUTUBE_CONCURRENCY, thread_name_prefix="youtube-api"
+            )
             print("✓ Connected to YouTube API")
         except Exception as e:
             print(f"✗ Failed to connect to YouTube API: {e}")
             raise
 
     async def disconnect(self):
-        """Release YouTube API client (no explicit disconnect needed)."""
+        """Release YouTube API client and its worker threads."""
         self.youtube = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
         print("✓ Disconnected from YouTube API")
 
-    def _get_channel_id_by_handle(self, channel_handle: str) -> Optional[str]:
+    async def _execute(self, request):
+        """
+        Run a blocking API request on a worker thread.
+
+        Requests are bounded by YT_CONCURRENCY and rate-limited by
+        YT_REQUEST_RATE across all videos. Transient failures are retried, so
+        a blip doesn't throw away the pages already fetched.
+        """
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                async with self._semaphore:
+                    await self._bucket.acquire()
+                    return await asyncio.get_running_loop().run_in_executor(
+                        self._executor, self._execute_in_thread, request
+                    )
+            except HttpError as e:
+                if e.resp.status not in RETRY_STATUSES or attempt == MAX_ATTEMPTS - 1:
+                    raise
+                delay = self._retry_delay(attempt, e.resp.get("retry-after"))
+            except (ConnectionError, TimeoutError):
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+                delay = self._retry_delay(attempt)
+
+            await asyncio.sleep(delay)
+
+    def _execute_in_thread(self, request):
+        """Execute a request with the calling worker thread's HTTP client."""
+        http = getattr(self._local, "http", None)
+        if http is None:
+            # httplib2.Http is not thread-safe, so each worker thread keeps its
+            # own; its keep-alive connections are reused by later requests
+            http = self._local.http = build_http()
+        return request.execute(http=http)
+
+    @staticmethod
+    def _retry_delay(attempt: int, retry_after: str = None) -> float:
+        """Seconds to wait before retry number `attempt` + 1."""
+        if retry_after is not None:
+            try:
+                return min(MAX_BACKOFF, float(retry_after))
+            except ValueError:
+                pass  # HTTP-date form; fall back to exponential backoff
+
+        # Exponential backoff with jitter, so parallel requests don't retry in step
+        return min(MAX_BACKOFF, 0.5 * 2**attempt * (1 + random.random()))
+
+    @staticmethod
+    def _read_cache(path: Optional[Path]) -> dict:
+        """Read a cache file ({} without a path, or if missing or unreadable)."""
+        if path is None:
+            return {}
+        try:
+            return read_json(path)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_cache(path: Optional[Path], cache: dict):
+        """Write a cache file (no-op without a path)."""
+        if path is not None:
+            write_json(path, cache)
+
+    async def _execute_if_modified(self, request, etag: str = None) -> Optional[Dict]:
+        """
+        Execute a request, sending `etag` (if any) as If-None-Match.
+
+        Returns:
+            the response, or None if the server answered 304 Not Modified
+        """
+        if etag is not None:
+            request.headers["If-None-Match"] = etag
+
+        try:
+            return await self._execute(request)
+        except HttpError as e:
+            if e.resp.status == 304 and etag is not None:
+                return None
+            raise
+
+    def _forget_handle(self, channel_handle: str, cache_file: Path = None):
+        """Drop a handle whose cached channel ID no longer resolves."""
+        handles = self._read_cache(cache_file)
+        if handles.pop(channel_handle.lstrip("@").lower(), None):
+            self._write_cache(cache_file, handles)
+
+    async def _get_channel_id_by_handle(
+        self, channel_handle: str, cache_file: Path = None
+    ) -> Optional[str]:
         """
         Resolve a channel @handle or custom URL to a channel ID.
 
+        Results are cached in `cache_file` for HANDLES_CACHE_TTL, so known
+        handles cost no API quota.
+
         Args:
             channel_handle: handle (e.g. @channelname or channelname)
+            cache_file: handle cache file (no caching if None)
 
         Returns:
             channel_id or None
         """
-        try:
-            handle = channel_handle.lstrip("@")
+        handle = channel_handle.lstrip("@")
+        key = handle.lower()
+        handles = self._read_cache(cache_file)
+        now = datetime.now(timezone.utc)
+
+        cached = handles.get(key)
+        if cached:
+            # A malformed entry (e.g. hand-edited) counts as a miss and is
+            # overwritten by the lookup below
+            try:
+                resolved_at = datetime.fromisoformat(cached["resolved_at"])
+                if now - resolved_at < HANDLES_CACHE_TTL:
+                    return cached["channel_id"]
+            except (KeyError, TypeError, ValueError):
+                pass
+
+        channel_id = await self._search_channel_id(handle)
 
+        if channel_id:
+            handles[key] = {"channel_id": channel_id, "resolved_at": now.isoformat()}
+            self._write_cache(cache_file, handles)
+
+        return channel_id
+
+    async def _search_channel_id(self, handle: str) -> Optional[str]:
+        """Find a channel ID by handle via the search API."""
+        try:
             request = self.youtube.search().list(
                 part="snippet", q=handle, type="channel", maxResults=5
             )
-            response = request.execute()
+            response = await self._execute(request)
 
             if response["items"]:
                 # Prefer exact match
@@ -78,98 +264,146 @@ class YoutubeCommentsCollector(CommentsCollector):
             print(f"✗ Channel search error: {e}")
             return None
 
-    async def get_posts(self, channel_id: str, limit: int = 50) -> List[Dict]:
+    async def get_posts(
+        self,
+        channel_id: str,
+        limit: int = 50,
+        data_manager: ChannelDataManager = None,
+    ) -> List[Dict]:
         """
         Fetch the latest videos from a channel.
 
         Args:
             channel_id: channel ID or @handle
             limit: maximum number of videos to fetch
+            data_manager: the channel's data manager; if given, the resolved
+                handle and the fetched pages (ETag and videos) are cached in
+                its directory, and unchanged pages are not downloaded again
 
         Returns:
             List of videos in unified format
         """
+        handles_file = etags_file = None
+        if data_manager is not None:
+            handles_file = data_manager.base_dir / HANDLES_CACHE_NAME
+            etags_file = data_manager.base_dir / ETAGS_CACHE_NAME
+
         try:
             # Resolve handle to channel ID if needed
+            handle = None
             if not channel_id.startswith("UC") or "@" in channel_id:
+                handle = channel_id
                 print(f"Resolving channel handle: {channel_id}")
-                resolved_id = self._get_channel_id_by_handle(channel_id)
+                resolved_id = await self._get_channel_id_by_handle(
+                    channel_id, handles_file
+                )
                 if not resolved_id:
                     print(f"✗ Channel not found: {channel_id}")
                     return []
                 channel_id = resolved_id
                 print(f"✓ Resolved channel ID: {channel_id}")
 
+            etags = self._read_cache(etags_file)
+            channel_entry = etags.get("channel")
+            if channel_entry and channel_entry["id"] != channel_id:
+                etags = {}
+                channel_entry = None
+
             # Get the uploads playlist ID
             request = self.youtube.channels().list(
                 part="contentDetails,snippet", id=channel_id
             )
-            response = request.execute()
+            response = await self._execute_if_modified(
+                request, channel_entry["etag"] if channel_entry else None
+            )
 
-            if not response["items"]:
-                print(f"✗ Channel not found: {channel_id}")
-                return []
+            if response is not None:
+                if not response["items"]:
+                    print(f"✗ Channel not found: {channel_id}")
+                    if handle:
+                        # Re-resolve the handle on the next run
+                        self._forget_handle(handle, handles_file)
+                    return []
 
-            channel_info = response["items"][0]
-            channel_title = channel_info["snippet"]["title"]
-            uploads_playlist_id = channel_info["contentDetails"]["relatedPlaylists"][
-                "uploads"
-            ]
+                channel_info = response["items"][0]
+                channel_entry = {
+                    "id": channel_id,
+                    "etag": response.get("etag"),
+                    "title": channel_info["snippet"]["title"],
+                    "uploads": channel_info["contentDetails"]["relatedPlaylists"][
+                        "uploads"
+                    ],
+                }
+
+            channel_title = channel_entry["title"]
+            uploads_playlist_id = channel_entry["uploads"]
 
             print(f"✓ Channel: {channel_title}")
             print(f"Fetching latest {limit} videos...")
 
             videos = []
+            stats_tasks = []
+            cached_pages = etags.get("pages", {})
+            pages = {}
             next_page_token = None
 
-            while len(videos) < limit:
-                request = self.youtube.playlistItems().list(
-                    part="snippet,contentDetails",
-                    playlistId=uploads_playlist_id,
-                    maxResults=min(50, limit - len(videos)),
-                    pageToken=next_page_token,
-                )
-                response = request.execute()
-
-                for item in response["items"]:
-                    video_id = item["contentDetails"]["videoId"]
-                    snippet = item["snippet"]
-
-                    videos.append(
-                        {
-                            "id": video_id,
-                            "title": snippet["title"],
-                            "description": snippet.get("description", "")[:500],
-                            "date": snippet["publishedAt"],
-                            "thumbnail": snippet["thumbnails"]["default"]["url"],
-                        }
+            try:
+                while len(videos) < limit:
+                    max_results = min(50, limit - len(videos))
+                    request = self.youtube.playlistItems().list(
+                        part="snippet,contentDetails",
+                        playlistId=uploads_playlist_id,
+                        maxResults=max_results,
+                        pageToken=next_page_token,
                     )
-
-                next_page_token = response.get("nextPageToken")
-                if not next_page_token:
-                    break
-
-            # Fetch statistics in batches of 50 (YouTube API limit)
-            if videos:
-                video_ids = [v["id"] for v in videos]
-                stats_dict = {}
-
-                batch_size = 50
-                for i in range(0, len(video_ids), batch_size):
-                    batch_ids = video_ids[i : i + batch_size]
-                    stats_request = self.youtube.videos().list(
-                        part="statistics", id=",".join(batch_ids)
+                    page_key = (
+                        f"{uploads_playlist_id}:{next_page_token or ''}:{max_results}"
                     )
-                    stats_response = stats_request.execute()
-
-                    for item in stats_response["items"]:
-                        stats_dict[item["id"]] = item["statistics"]
+                    (
+                        page_videos,
+                        next_page_token,
+                        page_entry,
+                    ) = await self._get_playlist_page(
+                        request, cached_pages.get(page_key)
+                    )
+                    if page_entry is not None:
+                        pages[page_key] = page_entry
+                    videos.extend(page_videos)
+
+                    # Pages hold at most 50 videos (the videos.list limit), so each
+                    # page's statistics are fetched while the next page loads
+                    page_ids = [video["id"] for video in page_videos]
+                    if page_ids:
+                        stats_tasks.append(
+                            asyncio.create_task(self._get_video_statistics(page_ids))
+                        )
 
-                for video in videos:
-                    stats = stats_dict.get(video["id"], {})
-                    video["views"] = int(stats.get("viewCount", 0))
-                    video["likes"] = int(stats.get("likeCount", 0))
-                    video["comments_count"] = int(stats.get("commentCount", 0))
+                    if not next_page_token:
+                        break
+
+                if videos:
+                    stats_dict = {}
+                    for page_stats in await asyncio.gather(*stats_tasks):
+                        stats_dict.update(page_stats)
+
+                    for video in videos:
+                        stats = stats_dict.get(video["id"], {})
+                        video["views"] = int(stats.get("viewCount", 0))
+                        video["likes"] = int(stats.get("likeCount", 0))
+                        video["comments_count"] = int(stats.get("commentCount", 0))
+            finally:
+                # If a page or a statistics request failed, don't leave the
+                # other statistics requests running with nobody awaiting them
+                for task in stats_tasks:
+                    task.cancel()
+                await asyncio.gather(*stats_tasks, return_exceptions=True)
+
+            # Only this sync's pages are kept (page tokens shift as videos
+            # are uploaded), so the cache stays as small as the page list
+            if channel_entry["etag"]:
+                self._write_cache(
+                    etags_file, {"channel": channel_entry, "pages": pages}
+                )
 
             print(f"✓ Fetched {len(videos)} videos")
             return videos
@@ -181,8 +415,100 @@ class YoutubeCommentsCollector(CommentsCollector):
             print(f"✗ Error fetching videos: {e}")
             return []
 
+    async def _get_playlist_page(
+        self, request, cached: Optional[Dict]
+    ) -> Tuple[List[Dict], Optional[str], Optional[Dict]]:
+        """
+        Fetch one playlist page, revalidating the cached entry for it.
+
+        Args:
+            request: playlistItems.list request for the page
+            cached: cache entry from a previous sync, or None
+
+        Returns:
+            (videos, next page token, cache entry for the page or None)
+        """
+        # Entries without the videos (written before they were kept) cannot
+        # stand in for the page, so it is fetched unconditionally
+        if cached and "videos" not in cached:
+            cached = None
+
+        response = await self._execute_if_modified(
+            request, cached["etag"] if cached else None
+        )
+
+        if response is None:
+            # The returned videos get statistics added, so the entry's own
+            # dicts are copied rather than handed out
+            videos = [dict(video) for video in cached["videos"]]
+            return videos, cached["next_page_token"], cached
+
+        videos = []
+        for item in response["items"]:
+            snippet = item["snippet"]
+            videos.append(
+                {
+                    "id": item["contentDetails"]["videoId"],
+                    "title": snippet["title"],
+                    "description": snippet.get("description", "")[:500],
+                    "date": snippet["publishedAt"],
+                    "thumbnail": snippet["thumbnails"]["default"]["url"],
+                }
+            )
+
+        next_page_token = response.get("nextPageToken")
+        entry = None
+        if "etag" in response:
+            entry = {
+                "etag": response["etag"],
+                "videos": [
+                    {field: video[field] for field in VIDEO_FIELDS} for video in videos
+                ],
+                "next_page_token": next_page_token,
+            }
+        return videos, next_page_token, entry
+
+    async def _get_video_statistics(self, video_ids: List[str]) -> Dict[str, Dict]:
+        """Fetch statistics for up to 50 videos, keyed by video ID."""
+        request = self.youtube.videos().list(
+            part="statistics",
+            id=",".join(video_ids),
+            # Only the counters used by get_posts (partial response)
+            fields="items(id,statistics(viewCount,likeCount,commentCount))",
+        )
+        response = await self._execute(request)
+        return {item["id"]: item["statistics"] for item in response["items"]}
+
+    def _get_user(self, snippet: Dict) -> Dict:
+        """
+        Return the user dict for a comment author.
+
+        One dict is shared by all comments of the same author (and display
+        name), so it must not be modified.
+        """
+        name = snippet["authorDisplayName"]
+        user_id = (
+            snippet["authorChannelId"]["value"]
+            if "authorChannelId" in snippet
+            else name
+        )
+
+        user = self._users.get((user_id, name))
+        if user is None:
+            user = self._users[(user_id, name)] = {
+                "id": user_id,
+                "username": name,
+                "first_name": name,
+                "last_name": None,
+            }
+        return user
+
     async def get_post_comments(
-        self, channel_id: str, post_id: str, existing_comment_ids: set = None
+        self,
+        channel_id: str,
+        post_id: str,
+        existing_comment_ids: set = None,
+        since_date: str = None,
     ) -> List[Dict]:
         """
         Fetch comments for a video.
@@ -191,6 +517,8 @@ class YoutubeCommentsCollector(CommentsCollector):
             channel_id: channel ID (unused for YouTube but required by interface)
             post_id: video ID
             existing_comment_ids: set of already-fetched comment IDs
+            since_date: publishedAt of the newest stored comment thread; older
+                pages are not fetched
 
         Returns:
             List of new comments
@@ -214,13 +542,15 @@ class YoutubeCommentsCollector(CommentsCollector):
                 )
 
                 try:
-                    response = request.execute()
+                    response = await self._execute(request)
                 except HttpError as e:
                     if e.resp.status == 403:
-                        print("  └─ Comments disabled")
+                        print(f"  └─ Video {post_id}: comments disabled")
                         return []
                     raise
 
+                new_threads = []  # (comment, reply count) per new thread on the page
+
                 for item in response["items"]:
                     top_comment = item["snippet"]["topLevelComment"]
                     comment_id = top_comment["id"]
@@ -234,45 +564,60 @@ class YoutubeCommentsCollector(CommentsCollector):
                         "comment_id": comment_id,
                         "post_id": post_id,
                         "comment_type": "top_level",
-                        "user": {
-                            "id": snippet["authorChannelId"]["value"]
-                            if "authorChannelId" in snippet
-                            else snippet["authorDisplayName"],
-                            "username": snippet["authorDisplayName"],
-                            "first_name": snippet["authorDisplayName"],
-                            "last_name": None,
-                        },
+                        "user": self._get_user(snippet),
                         "text": snippet["textDisplay"],
                         "date": snippet["publishedAt"],
                         "likes": snippet["likeCount"],
                     }
 
+                    new_threads.append((comment, item["snippet"]["totalReplyCount"]))
+
+                # Replies of all new threads on the page are fetched concurrently
+                replies_per_thread = iter(
+                    await asyncio.gather(
+                        *(
+                            self._get_comment_replies(
+                                comment["comment_id"], post_id, existing_comment_ids
+                            )
+                            for comment, reply_count in new_threads
+                            if reply_count > 0
+                        )
+                    )
+                )
+
+                for comment, reply_count in new_threads:
                     comments.append(comment)
                     new_count += 1
 
-                    # Fetch replies if any
-                    reply_count = item["snippet"]["totalReplyCount"]
                     if reply_count > 0:
-                        replies = await self._get_comment_replies(
-                            comment_id, post_id, existing_comment_ids
-                        )
+                        replies = next(replies_per_thread)
                         comments.extend(replies)
                         new_count += len(replies)
 
+                # Threads come newest first, so once a page reaches back past
+                # since_date the remaining pages are already stored (ISO 8601
+                # UTC timestamps compare correctly as strings)
+                if since_date and any(
+                    item["snippet"]["topLevelComment"]["snippet"]["publishedAt"]
+                    < since_date
+                    for item in response["items"]
+                ):
+                    break
+
                 next_page_token = response.get("nextPageToken")
                 if not next_page_token:
                     break
 
             if new_count > 0:
-                print(f"  └─ Fetched {new_count} new comments")
+                print(f"  └─ Video {post_id}: fetched {new_count} new comments")
 
             return comments
 
         except HttpError as e:
-            print(f"  └─ ✗ YouTube API error: {e}")
+            print(f"  └─ Video {post_id}: ✗ YouTube API error: {e}")
             return []
         except Exception as e:
-            print(f"  └─ ✗ Error: {e}")
+            print(f"  └─ Video {post_id}: ✗ Error: {e}")
             return []
 
     async def _get_comment_replies(
@@ -291,7 +636,7 @@ class YoutubeCommentsCollector(CommentsCollector):
                     pageToken=next_page_token,
                     textFormat="plainText",
                 )
-                response = request.execute()
+                response = await self._execute(request)
 
                 for item in response["items"]:
                     reply_id = item["id"]
@@ -306,14 +651,7 @@ class YoutubeCommentsCollector(CommentsCollector):
                         "post_id": post_id,
                         "comment_type": "reply",
                         "parent_id": comment_id,
-                        "user": {
-                            "id": snippet["authorChannelId"]["value"]
-                            if "authorChannelId" in snippet
-                            else snippet["authorDisplayName"],
-                            "username": snippet["authorDisplayName"],
-                            "first_name": snippet["authorDisplayName"],
-                            "last_name": None,
-                        },
+                        "user": self._get_user(snippet),
                         "text": snippet["textDisplay"],
                         "date": snippet["publishedAt"],
                         "likes": snippet["likeCount"],
@@ -351,7 +689,7 @@ class YoutubeCommentsCollector(CommentsCollector):
         print("=" * 60)
 
         print(f"Fetching latest {posts_limit} videos...")
-        videos = await self.get_posts(channel_id, posts_limit)
+        videos = await self.get_posts(channel_id, posts_limit, data_manager)
 
         if not videos:
             print("✗ No videos found")
@@ -373,9 +711,34 @@ class YoutubeCommentsCollector(CommentsCollector):
             f"\nProcessing videos (updating only videos newer than {MAX_VIDEO_AGE_DAYS} days):\n"
         )
 
-        for i, video in enumerate(videos, 1):
+        # One directory scan instead of a stat() per video
+        existing_posts = set(data_manager.get_all_post_ids())
+
+        def parse_date(video):
+            return datetime.fromisoformat(video["date"].replace("Z", "+00:00"))
+
+        # Uploads come newest first, so the videos past the age cutoff are the
+        # tail of the list; the stored ones there are skipped without a check
+        # (or a line of output) each
+        videos.sort(key=lambda video: video["date"], reverse=True)
+        cutoff_index = next(
+            (i for i, video in enumerate(videos) if parse_date(video) < cutoff_date),
+            len(videos),
+        )
+        pending = [
+            (index, video)
+            for index, video in enumerate(videos, 1)
+            if index <= cutoff_index or video["id"] not in existing_posts
+        ]
+
+        skipped_old = len(videos) - len(pending)
+        if skipped_old:
+            print(f"Skipped {skipped_old} stored videos (older than threshold)")
+            stats["skipped_posts"] += skipped_old
+
+        async def process_video(video, index):
             video_id = video["id"]
-            video_date = datetime.fromisoformat(video["date"].replace("Z", "+00:00"))
+            video_date = parse_date(video)
             video_age_days = (now - video_date).days
 
             video_title = (
@@ -383,52 +746,69 @@ class YoutubeCommentsCollector(CommentsCollector):
                 if len(video["title"]) > 50
                 else video["title"]
             )
-            print(
-                f"[{i}/{len(videos)}] {video_title} ({video_age_days}d ago)...", end=" "
-            )
+            label = f"[{index}/{len(videos)}] {video_title} ({video_age_days}d ago)..."
 
             comments_count = video.get("comments_count", 0)
 
-            if data_manager.post_exists(video_id):
-                if video_date < cutoff_date:
-                    print("Skipped (older than threshold)")
+            if video_id in existing_posts:
+                existing_ids = data_manager.load_comment_ids(video_id)
+
+                if comments_count == 0 and not existing_ids:
+                    print(f"{label} Skipped (comments disabled)")
                     stats["skipped_posts"] += 1
-                else:
-                    if comments_count == 0 and not data_manager.load_comments(video_id):
-                        print("Skipped (comments disabled)")
-                        stats["skipped_posts"] += 1
-                    else:
-                        print("Updating comments...")
-                        existing_comments = data_manager.load_comments(video_id)
-                        existing_ids = {c["comment_id"] for c in existing_comments}
-
-                        new_comments = await self.get_post_comments(
-                            channel_id, video_id, existing_ids
-                        )
+                    return
+
+                # commentCount from the video statistics tells whether there is
+                # anything new without paging through the comment threads
+                if len(existing_ids) >= comments_count:
+                    print(f"{label} Skipped (no new comments)")
+                    stats["total_comments"] += len(existing_ids)
+                    stats["skipped_posts"] += 1
+                    return
 
-                        if new_comments:
-                            all_comments = existing_comments + new_comments
-                            data_manager.save_post_data(video_id, video, all_comments)
-                            stats["new_comments"] += len(new_comments)
-                            stats["total_comments"] += len(all_comments)
-                            stats["updated_posts"] += 1
-                        else:
-                            stats["total_comments"] += len(existing_comments)
-                            stats["skipped_posts"] += 1
+                print(f"{label} Updating comments...")
+                since_date = data_manager.load_newest_thread_date(video_id)
+                new_comments = await self.get_post_comments(
+                    channel_id, video_id, existing_ids, since_date
+                )
+
+                if new_comments:
+                    total = data_manager.append_comments(video_id, video, new_comments)
+                    stats["new_comments"] += len(new_comments)
+                    stats["total_comments"] += total
+                    stats["updated_posts"] += 1
+                else:
+                    stats["total_comments"] += len(existing_ids)
+                    stats["skipped_posts"] += 1
             else:
                 if comments_count == 0:
-                    print("Skipped (comments disabled)")
+                    print(f"{label} Skipped (comments disabled)")
                     data_manager.save_post_data(video_id, video, [])
+                    existing_posts.add(video_id)
                     stats["skipped_posts"] += 1
-                else:
-                    print("New video, downloading...")
-                    comments = await self.get_post_comments(channel_id, video_id)
-                    data_manager.save_post_data(video_id, video, comments)
-                    stats["new_posts"] += 1
-                    stats["new_comments"] += len(comments)
-                    stats["total_comments"] += len(comments)
-
-            await asyncio.sleep(0.1)
+                    return
+
+                print(f"{label} New video, downloading...")
+                comments = await self.get_post_comments(channel_id, video_id)
+                data_manager.save_post_data(video_id, video, comments)
+                existing_posts.add(video_id)
+                stats["new_posts"] += 1
+                stats["new_comments"] += len(comments)
+                stats["total_comments"] += len(comments)
+
+        # Videos are processed concurrently; _execute bounds and rate-limits
+        # the API requests they make
+        tasks = [
+            asyncio.create_task(process_video(video, index)) for index, video in pending
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # If a video failed, don't leave the others writing files after
+            # the client is disconnected
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
         channel_info = {
             "channel": channel_id,